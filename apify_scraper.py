@@ -3,21 +3,120 @@ Apify를 사용하여 플랫폼 포스트 데이터를 가져오고 이미지를
 """
 import os
 import json
+import asyncio
+import hashlib
+import re
+import shutil
+import queue
+import shelve
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
-from datetime import datetime
-from urllib.parse import urlparse
 from apify_client import ApifyClient
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # orjson이 없으면 표준 json 사용
+    orjson = None
+
+try:
+    import aiohttp
+    import aiofiles
+except ImportError:  # 비동기 다운로드(use_async=True)에서만 필요
+    aiohttp = aiofiles = None
+
 # 환경 변수 로드
 load_dotenv()
 
+# 다운로드 진행 로그 (워커 스레드가 stdout 락을 두고 경합하지 않도록 logging 사용)
+log = logging.getLogger(__name__)
+
 # 기본 저장 경로 설정
 BASE_DIR = Path(__file__).parent
 IMAGES_DIR = BASE_DIR / "images"
 DATA_DIR = BASE_DIR / "data"
 
+# 포스트 데이터에서 이미지 URL을 찾을 키 (우선순위 순서)
+IMAGE_URL_KEYS = (
+    'displayUrl', 'imageUrl', 'url', 'images',
+    'displayUrls', 'imageUrls', 'media', 'mediaUrls'
+)
+
+# URL 경로 마지막 구간의 확장자 추출용 정규식 (쿼리스트링/프래그먼트 제외)
+_EXT_FROM_URL = re.compile(r'^[^?#]*/[^/?#]*\.([A-Za-z0-9]{1,5})(?:[?#]|$)')
+
+# 파일 쓰기 시 청크를 모아서 한 번에 쓰는 버퍼 크기 (write 시스템콜 횟수 감소)
+WRITE_BUFFER_SIZE = 256 * 1024
+
+# 병렬 처리 스레드 수 (포스트 단위 / 포스트 내 이미지 단위)
+POST_WORKERS = 4
+DOWNLOAD_WORKERS = 8
+
+# 다운로드 재시도 (동기/비동기 공통: 재시도 횟수, 백오프 계수(초), 재시도할 HTTP 상태 코드)
+DOWNLOAD_RETRIES = 3
+RETRY_BACKOFF = 0.3
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# 비동기 다운로드 타임아웃 (초, 요청별 연결/읽기 기준 → 연결 풀 대기 시간은 포함하지 않음)
+ASYNC_CONNECT_TIMEOUT = 10
+ASYNC_READ_TIMEOUT = 30
+
+# 이미지 다운로드용 공용 세션 (keep-alive 연결 재사용 + 재시도)
+# 호스트당 연결 풀 크기를 최대 동시 다운로드 수에 맞춰 소켓을 버리고 다시 여는 일이 없도록 함
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=POST_WORKERS * DOWNLOAD_WORKERS,
+    pool_block=True,
+    max_retries=Retry(total=DOWNLOAD_RETRIES, backoff_factor=RETRY_BACKOFF, status_forcelist=RETRY_STATUSES)
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+SESSION.headers.update({
+    "User-Agent": "Mozilla/5.0 (compatible; vlm-image-scraper/1.0)",
+    "Accept-Encoding": "gzip, deflate"
+})
+
+# URL별 ETag 저장소 (재실행 시 If-None-Match 조건부 요청용, 스레드 간 공유)
+ETAG_DB_PATH = DATA_DIR / "etags.db"
+_etag_db = None
+_etag_lock = threading.Lock()
+
+
+def _get_etag(image_url: str):
+    """저장된 ETag를 반환합니다. 없으면 None."""
+    global _etag_db
+    with _etag_lock:
+        if _etag_db is None:
+            _etag_db = shelve.open(str(ETAG_DB_PATH))
+        return _etag_db.get(image_url)
+
+
+def _set_etag(image_url: str, etag):
+    """응답의 ETag를 저장합니다."""
+    global _etag_db
+    if not etag:
+        return
+    with _etag_lock:
+        if _etag_db is None:
+            _etag_db = shelve.open(str(ETAG_DB_PATH))
+        _etag_db[image_url] = etag
+
+
+def close_etag_db():
+    """ETag 저장소를 닫습니다."""
+    global _etag_db
+    with _etag_lock:
+        if _etag_db is not None:
+            _etag_db.close()
+            _etag_db = None
+
 
 def create_directories():
     """필요한 디렉토리를 생성합니다."""
@@ -36,20 +135,39 @@ def download_image(image_url: str, save_path: Path) -> bool:
     Returns:
         bool: 다운로드 성공 여부
     """
+    # 이미 받은 이미지: ETag가 있으면 조건부 요청으로 재검증, 없으면 건너뛰기
+    headers = {}
+    if save_path.exists() and save_path.stat().st_size > 0:
+        etag = _get_etag(image_url)
+        if not etag:
+            return True
+        headers['If-None-Match'] = etag
+    
+    # 임시 파일에 받은 뒤 교체 (중간에 끊겨도 잘린 파일이 완료된 이미지로 남지 않음)
+    tmp_path = save_path.with_suffix(save_path.suffix + '.part')
     try:
-        response = requests.get(image_url, timeout=30, stream=True)
-        response.raise_for_status()
+        with SESSION.get(image_url, headers=headers, timeout=30, stream=True) as response:
+            # 304: 변경 없음 → 기존 파일 그대로 사용
+            if response.status_code == 304:
+                return True
+            response.raise_for_status()
+            
+            # 파일 저장 (소켓에서 WRITE_BUFFER_SIZE 단위로 바로 복사)
+            response.raw.decode_content = True
+            with open(tmp_path, 'wb', buffering=0) as f:
+                shutil.copyfileobj(response.raw, f, length=WRITE_BUFFER_SIZE)
+            etag = response.headers.get('ETag')
         
-        # 파일 저장
-        with open(save_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        # 새 본문을 다 받은 뒤에만 기존 캐시 이미지를 교체하고 ETag 갱신
+        os.replace(tmp_path, save_path)
+        _set_etag(image_url, etag)
         
-        print(f"✓ 이미지 저장 완료: {save_path.name}")
+        log.info("✓ 이미지 저장 완료: %s", save_path.name)
         return True
         
     except Exception as e:
-        print(f"✗ 이미지 다운로드 실패 ({image_url}): {e}")
+        tmp_path.unlink(missing_ok=True)
+        log.warning("✗ 이미지 다운로드 실패 (%s): %s", image_url, e)
         return False
 
 
@@ -62,14 +180,44 @@ def save_metadata(post_data: dict, save_path: Path):
         save_path (Path): 저장할 경로
     """
     try:
-        with open(save_path, 'w', encoding='utf-8') as f:
-            json.dump(post_data, f, ensure_ascii=False, indent=2)
-        print(f"✓ 메타데이터 저장 완료: {save_path.name}")
+        # 전체를 bytes로 한 번에 인코딩한 뒤 단일 write로 저장
+        if orjson is not None:
+            data = orjson.dumps(post_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        else:
+            data = json.dumps(post_data, ensure_ascii=False, indent=2).encode('utf-8')
+        
+        with open(save_path, 'wb', buffering=0) as f:
+            f.write(data)
+        log.info("✓ 메타데이터 저장 완료: %s", save_path.name)
     except Exception as e:
-        print(f"✗ 메타데이터 저장 실패: {e}")
+        log.warning("✗ 메타데이터 저장 실패: %s", e)
+
+
+def _iter_dataset_items(dataset_client, page_size: int = 1000):
+    """
+    데이터셋 아이템을 페이지 단위로 가져와 하나씩 반환합니다.
+    현재 페이지를 처리하는 동안 다음 페이지를 백그라운드에서 미리 요청합니다.
+    
+    Args:
+        dataset_client: Apify DatasetClient
+        page_size (int): 한 번에 가져올 아이템 수
+    
+    Yields:
+        dict: 포스트 데이터
+    """
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        offset = 0
+        next_page = prefetcher.submit(dataset_client.list_items, offset=offset, limit=page_size)
+        while True:
+            items = next_page.result().items
+            if not items:
+                return
+            offset += len(items)
+            next_page = prefetcher.submit(dataset_client.list_items, offset=offset, limit=page_size)
+            yield from items
 
 
-def fetch_platform_posts(actor_id: str, run_input: dict, save_images: bool = True):
+def fetch_platform_posts(actor_id: str, run_input: dict, save_images: bool = True, use_async: bool = False):
     """
     Apify Actor를 실행하여 플랫폼 포스트 데이터를 가져오고 이미지를 저장합니다.
     
@@ -77,6 +225,7 @@ def fetch_platform_posts(actor_id: str, run_input: dict, save_images: bool = Tru
         actor_id (str): Apify Actor ID (예: 'apify/instagram-scraper')
         run_input (dict): Actor 실행에 필요한 입력 파라미터
         save_images (bool): 이미지 자동 저장 여부 (기본: True)
+        use_async (bool): aiohttp 기반 비동기 다운로드 사용 여부 (기본: False)
     
     Returns:
         list: 수집된 포스트 데이터 리스트
@@ -87,6 +236,10 @@ def fetch_platform_posts(actor_id: str, run_input: dict, save_images: bool = Tru
     if not api_token:
         raise ValueError("APIFY_API_TOKEN이 설정되지 않았습니다. .env 파일을 확인하세요.")
     
+    # 비동기 다운로드 패키지는 Actor 실행 전에 확인 (다운로드 도중 전체가 실패하지 않도록)
+    if use_async and save_images and (aiohttp is None or aiofiles is None):
+        raise ImportError("use_async=True에는 aiohttp, aiofiles 패키지가 필요합니다: pip install aiohttp aiofiles")
+    
     # 디렉토리 생성
     if save_images:
         create_directories()
@@ -103,15 +256,27 @@ def fetch_platform_posts(actor_id: str, run_input: dict, save_images: bool = Tru
     run = client.actor(actor_id).call(run_input=run_input)
     
     # 결과 가져오기 및 처리
+    dataset_client = client.dataset(run["defaultDatasetId"])
     results = []
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
-    for idx, item in enumerate(client.dataset(run["defaultDatasetId"]).iterate_items(), 1):
-        results.append(item)
-        
+    if use_async:
+        # 비동기 모드: 모든 포스트를 하나의 aiohttp 세션으로 동시에 다운로드
+        results = list(_iter_dataset_items(dataset_client))
         if save_images:
-            print(f"\n--- 포스트 {idx} 처리 중 ---")
-            process_post_images(item, idx, timestamp)
+            asyncio.run(_process_posts_async(results))
+    else:
+        # 포스트 처리는 스레드 풀에서 병렬로 진행 (데이터셋 순회와 파이프라이닝)
+        with ThreadPoolExecutor(max_workers=POST_WORKERS) as executor:
+            futures = []
+            for idx, item in enumerate(_iter_dataset_items(dataset_client), 1):
+                results.append(item)
+                
+                if save_images:
+                    print(f"\n--- 포스트 {idx} 처리 중 ---")
+                    futures.append(executor.submit(process_post_images, item, idx))
+            
+            for future in as_completed(futures):
+                future.result()
     
     print(f"\n{'='*60}")
     print(f"✓ 총 {len(results)}개의 포스트를 수집했습니다.")
@@ -122,53 +287,191 @@ def fetch_platform_posts(actor_id: str, run_input: dict, save_images: bool = Tru
     return results
 
 
-def process_post_images(post_data: dict, post_idx: int, timestamp: str):
+def _extract_image_urls(post_data: dict) -> list:
+    """포스트 데이터에서 이미지 URL 목록을 추출합니다."""
+    # 이미지 URL 추출 (다양한 키 이름 시도)
+    # dict에 바로 넣어 중복 제거 + 발견 순서 유지 (재실행 시 파일명 일관성)
+    image_urls = {}
+    
+    for key in IMAGE_URL_KEYS:
+        value = post_data.get(key)
+        if isinstance(value, str):
+            image_urls[value] = None
+        elif isinstance(value, list):
+            image_urls.update(dict.fromkeys(url for url in value if isinstance(url, str)))
+    
+    return list(image_urls)
+
+
+def _image_path(post_idx: int, image_url: str) -> Path:
+    """
+    이미지 URL에 대한 저장 경로를 생성합니다.
+    URL 해시 기반 파일명이라 재실행 시 같은 이미지는 같은 경로가 됩니다.
+    """
+    match = _EXT_FROM_URL.search(image_url)
+    ext = '.' + match.group(1).lower() if match else '.jpg'
+    url_hash = hashlib.blake2b(image_url.encode(), digest_size=8).hexdigest()
+    filename = f"post_{post_idx}_{url_hash}{ext}"
+    return IMAGES_DIR / filename
+
+
+def _metadata_path(post_idx: int, post_data: dict) -> Path:
+    """
+    포스트 메타데이터 저장 경로를 생성합니다.
+    포스트 URL(없으면 id) 해시 기반이라 재실행 시 같은 파일을 덮어씁니다.
+    """
+    post_key = str(post_data.get('url') or post_data.get('id') or post_idx)
+    post_hash = hashlib.blake2b(post_key.encode(), digest_size=8).hexdigest()
+    return DATA_DIR / f"post_{post_idx}_{post_hash}_metadata.json"
+
+
+def process_post_images(post_data: dict, post_idx: int):
     """
     포스트에서 이미지를 추출하고 저장합니다.
     
     Args:
         post_data (dict): 포스트 데이터
         post_idx (int): 포스트 인덱스
-        timestamp (str): 타임스탬프
     """
-    # 이미지 URL 추출 (다양한 키 이름 시도)
-    image_urls = []
-    possible_keys = [
-        'displayUrl', 'imageUrl', 'url', 'images', 
-        'displayUrls', 'imageUrls', 'media', 'mediaUrls'
-    ]
-    
-    for key in possible_keys:
-        if key in post_data:
-            value = post_data[key]
-            if isinstance(value, str):
-                image_urls.append(value)
-            elif isinstance(value, list):
-                image_urls.extend([url for url in value if isinstance(url, str)])
-    
-    # 중복 제거
-    image_urls = list(set(image_urls))
+    image_urls = _extract_image_urls(post_data)
     
     if not image_urls:
-        print(f"  이미지 URL을 찾을 수 없습니다.")
+        log.info("  이미지 URL을 찾을 수 없습니다.")
         return
     
-    print(f"  발견된 이미지: {len(image_urls)}개")
+    log.info("  발견된 이미지: %d개", len(image_urls))
+    
+    # 각 이미지 병렬 다운로드 (SESSION의 연결 풀 공유)
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        futures = [
+            executor.submit(download_image, image_url, _image_path(post_idx, image_url))
+            for image_url in image_urls
+        ]
+        for future in as_completed(futures):
+            future.result()
     
-    # 각 이미지 다운로드
-    for img_idx, image_url in enumerate(image_urls, 1):
-        # 파일명 생성
-        ext = Path(urlparse(image_url).path).suffix or '.jpg'
-        filename = f"post_{post_idx}_{timestamp}_img{img_idx}{ext}"
-        save_path = IMAGES_DIR / filename
+    # 메타데이터 저장
+    save_metadata(post_data, _metadata_path(post_idx, post_data))
+
+
+def _retry_delay(attempt: int, retry_after=None) -> float:
+    """재시도 전 대기 시간 (Retry-After 헤더가 초 단위 숫자면 우선, 아니면 지수 백오프)"""
+    try:
+        return max(0.0, float(retry_after))
+    except (TypeError, ValueError):
+        return RETRY_BACKOFF * 2 ** attempt
+
+
+async def _aget_to_file(session, image_url: str, headers: dict, tmp_path: Path, retry: bool):
+    """
+    이미지를 한 번 요청해 본문을 tmp_path에 저장합니다.
+    
+    Returns:
+        tuple: (HTTP 상태 코드, ETag, Retry-After) - 304나 재시도할 상태 코드(retry=True)면 저장하지 않음
+    """
+    async with session.get(image_url, headers=headers) as response:
+        if response.status == 304 or (retry and response.status in RETRY_STATUSES):
+            return response.status, None, response.headers.get('Retry-After')
+        response.raise_for_status()
         
-        # 이미지 다운로드
-        download_image(image_url, save_path)
+        # 파일 저장 (aiofiles로 이벤트 루프 블로킹 방지)
+        async with aiofiles.open(tmp_path, 'wb') as f:
+            async for chunk in response.content.iter_chunked(65536):
+                await f.write(chunk)
+        return response.status, response.headers.get('ETag'), None
+
+
+async def _adownload(session, image_url: str, save_path: Path) -> bool:
+    """
+    aiohttp 세션으로 이미지를 비동기 다운로드하여 저장합니다.
+    
+    동기 경로(SESSION)와 같이 429/5xx 응답과 연결 오류/타임아웃은 DOWNLOAD_RETRIES번까지 다시 요청합니다.
+    
+    Args:
+        session (aiohttp.ClientSession): 공유 세션
+        image_url (str): 다운로드할 이미지 URL
+        save_path (Path): 저장할 경로
+    
+    Returns:
+        bool: 다운로드 성공 여부
+    """
+    # 이미 받은 이미지: ETag가 있으면 조건부 요청으로 재검증, 없으면 건너뛰기
+    headers = {}
+    if save_path.exists() and save_path.stat().st_size > 0:
+        etag = _get_etag(image_url)
+        if not etag:
+            return True
+        headers['If-None-Match'] = etag
+    
+    # 임시 파일에 받은 뒤 교체 (중간에 끊겨도 잘린 파일이 완료된 이미지로 남지 않음)
+    tmp_path = save_path.with_suffix(save_path.suffix + '.part')
+    try:
+        for attempt in range(DOWNLOAD_RETRIES + 1):
+            retry = attempt < DOWNLOAD_RETRIES
+            try:
+                status, etag, retry_after = await _aget_to_file(session, image_url, headers, tmp_path, retry)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if not retry:
+                    raise
+                status, retry_after = None, None
+            
+            # 304: 변경 없음 → 기존 파일 그대로 사용
+            if status == 304:
+                return True
+            if status is not None and status not in RETRY_STATUSES:
+                break
+            await asyncio.sleep(_retry_delay(attempt, retry_after))
+        
+        # 새 본문을 다 받은 뒤에만 기존 캐시 이미지를 교체하고 ETag 갱신
+        os.replace(tmp_path, save_path)
+        _set_etag(image_url, etag)
+        
+        log.info("✓ 이미지 저장 완료: %s", save_path.name)
+        return True
+        
+    except Exception as e:
+        tmp_path.unlink(missing_ok=True)
+        log.warning("✗ 이미지 다운로드 실패 (%s): %s", image_url, e)
+        return False
+
+
+async def process_post_images_async(session, post_data: dict, post_idx: int):
+    """
+    process_post_images의 비동기 버전입니다.
+    
+    Args:
+        session (aiohttp.ClientSession): 공유 세션
+        post_data (dict): 포스트 데이터
+        post_idx (int): 포스트 인덱스
+    """
+    image_urls = _extract_image_urls(post_data)
+    
+    if not image_urls:
+        log.info("  이미지 URL을 찾을 수 없습니다.")
+        return
+    
+    log.info("  [포스트 %d] 발견된 이미지: %d개", post_idx, len(image_urls))
+    
+    await asyncio.gather(*[
+        _adownload(session, image_url, _image_path(post_idx, image_url))
+        for image_url in image_urls
+    ])
     
     # 메타데이터 저장
-    metadata_filename = f"post_{post_idx}_{timestamp}_metadata.json"
-    metadata_path = DATA_DIR / metadata_filename
-    save_metadata(post_data, metadata_path)
+    save_metadata(post_data, _metadata_path(post_idx, post_data))
+
+
+async def _process_posts_async(posts: list):
+    """모든 포스트의 이미지를 하나의 aiohttp 세션으로 동시에 다운로드합니다."""
+    connector = aiohttp.TCPConnector(limit=64, limit_per_host=8, ttl_dns_cache=300)
+    # total 타임아웃은 연결 풀 대기 시간까지 포함해 대량 수집 시 뒤쪽 요청이 소켓을 받기 전에 끝나므로
+    # 요청별 연결/읽기 타임아웃만 설정
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=ASYNC_CONNECT_TIMEOUT, sock_read=ASYNC_READ_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=dict(SESSION.headers)) as session:
+        await asyncio.gather(*[
+            process_post_images_async(session, item, idx)
+            for idx, item in enumerate(posts, 1)
+        ])
 
 
 def main():
@@ -183,6 +486,12 @@ def main():
     # 예시: Instagram 포스트 스크래핑
     # 실제 사용 시 적절한 Actor ID와 파라미터로 변경하세요
     
+    # 로그는 큐에 쌓고 별도 리스너 스레드 하나가 출력 (워커 스레드 비차단)
+    log_queue = queue.Queue(-1)
+    log_listener = QueueListener(log_queue, logging.StreamHandler())
+    logging.basicConfig(level=logging.INFO, format='%(message)s', handlers=[QueueHandler(log_queue)])
+    log_listener.start()
+    
     actor_id = "apify/instagram-scraper"  # 사용할 Actor ID
     
     # URL만 입력하면 됩니다!
@@ -204,6 +513,10 @@ def main():
             
     except Exception as e:
         print(f"\n❌ 오류 발생: {e}")
+    finally:
+        SESSION.close()
+        close_etag_db()
+        log_listener.stop()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
 """
 카테고리별 분석 속성 정의
 """
+import sys
+from types import MappingProxyType
 
 # =============================================================================
 # 공통 속성 (모든 의류 카테고리에 적용)
@@ -244,9 +246,50 @@ CATEGORY_ATTRIBUTES_MAP = {
     "Shoes": SHOES_ATTRIBUTES,
     "Onepiece": ONEPIECE_ATTRIBUTES,
     "Hosiery": HOSIERY_ATTRIBUTES,
-    "Swimwear": {**SWIMWEAR_ONEPIECE_ATTRIBUTES, **SWIMWEAR_INNER_ATTRIBUTES, **SWIMWEAR_BOTTOMS_ATTRIBUTES},
+    # 병합은 import 시 한 번만 수행하고 읽기 전용으로 공유
+    "Swimwear": MappingProxyType({**SWIMWEAR_ONEPIECE_ATTRIBUTES, **SWIMWEAR_INNER_ATTRIBUTES, **SWIMWEAR_BOTTOMS_ATTRIBUTES}),
     "Headwear": HEADWEAR_ATTRIBUTES,
     "eyewear": EYEWEAR_ATTRIBUTES,
     "neckwear": NECKWEAR_ATTRIBUTES
 }
 
+# =============================================================================
+# 속성값 문자열 intern (여러 목록에 반복되는 값이 하나의 객체를 공유하도록)
+# 리스트는 Swimwear 병합 매핑과 공유되므로 제자리에서 교체
+# =============================================================================
+for _attrs in (COMMON_ATTRIBUTES, *CATEGORY_ATTRIBUTES_MAP.values(),
+               BACKGROUND_ATTRIBUTES, STYLING_ATTRIBUTES, MODEL_ATTRIBUTES):
+    for _values in _attrs.values():
+        _values[:] = [sys.intern(_v) for _v in _values]
+del _attrs, _values
+
+# 전체 속성값 집합 (전역 멤버십 검사용)
+ALL_ATTRIBUTE_VALUES = frozenset(
+    value
+    for attrs in CATEGORY_ATTRIBUTES_MAP.values()
+    for values in attrs.values()
+    for value in values
+)
+
+# =============================================================================
+# 속성명 → 카테고리 역인덱스
+# (sleeve length처럼 여러 카테고리에 있는 속성은 처음 등록된 카테고리로 매핑)
+# =============================================================================
+ATTR_TO_CATEGORY = {}
+for _cat, _attrs in CATEGORY_ATTRIBUTES_MAP.items():
+    for _attr in _attrs:
+        ATTR_TO_CATEGORY.setdefault(_attr, _cat)
+del _cat, _attrs, _attr
+
+# =============================================================================
+# 조회용 파생 매핑 (표시 순서용 tuple / O(1) 멤버십 검사용 frozenset)
+# =============================================================================
+CATEGORY_ATTRIBUTES_ORDER = {
+    cat: {attr: tuple(values) for attr, values in attrs.items()}
+    for cat, attrs in CATEGORY_ATTRIBUTES_MAP.items()
+}
+
+CATEGORY_ATTRIBUTES_SET = {
+    cat: {attr: frozenset(values) for attr, values in attrs.items()}
+    for cat, attrs in CATEGORY_ATTRIBUTES_MAP.items()
+}
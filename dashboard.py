@@ -5,6 +5,7 @@ VLM 비교 분석 대시보드 (간소화 버전)
 """
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
@@ -12,6 +13,16 @@ from datetime import datetime
 from io import BytesIO
 from PIL import Image
 import base64
+import functools
+import re
+import sys
+from collections import defaultdict
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pyarrow가 없으면 pandas 연산 사용
+    pa = pc = None
 
 # 페이지 설정
 st.set_page_config(
@@ -25,93 +36,373 @@ FNF_FILE = BASE_DIR / "fnf정답지.xlsx"
 ODDCONCEPT_FILE = BASE_DIR / "오드컨셉결과.xlsx"
 OUTPUT_DIR = BASE_DIR / "output"  # Gemini 분석 결과 폴더
 IMAGES_DIR = BASE_DIR / "images"  # 이미지 폴더
+IMAGES_PER_PAGE = 5  # 상세 비교표에서 한 페이지에 표시할 이미지 수
+
+# 텍스트 컬럼 타입 (Arrow 문자열 우선, pyarrow 없으면 기본 문자열 타입)
+TEXT_DTYPE = pd.StringDtype("pyarrow" if pa is not None else "python")
+
+# 정규화 사이드카 버전 (normalize_text_columns 등 정규화 결과가 바뀌면 올림 → 이전 사이드카는 다시 생성)
+SIDECAR_VERSION = 2
+
+# 사이드카 읽기/쓰기 실패로 취급하는 예외 (파일 손상, 권한, parquet 엔진 없음)
+_SIDECAR_ERRORS = (OSError, ValueError, ImportError) + ((pa.ArrowException,) if pa is not None else ())
+
+# 이미지 확장자 제거용 정규식
+_EXT_RE = re.compile(r'\.(?:jpe?g|png|gif|webp)$', re.IGNORECASE)
 
 def normalize_image_name(name):
     """이미지 이름 정규화 (확장자 제거, 소문자 변환)"""
     if pd.isna(name) or not name:
         return ""
-    name = str(name).strip().lower()
-    # 확장자 제거
-    for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp']:
-        if name.endswith(ext):
-            name = name[:-len(ext)]
-            break
-    return name
+    return _normalize_image_name(str(name))
+
+
+@functools.lru_cache(maxsize=8192)
+def _normalize_image_name(name: str) -> str:
+    return _EXT_RE.sub('', name.strip().lower())
+
+
+def normalize_for_compare(text):
+    """비교용 정규화 (소문자 + 하이픈/공백/언더스코어 제거)"""
+    if not text:
+        return ''
+    return _normalize_for_compare(str(text))
+
+
+# 비교 시 무시하는 문자 (하이픈/공백/언더스코어)
+_COMPARE_DELETE = str.maketrans('', '', '- _')
+
+
+# 어휘(Cat/Subcat/Key/단어)가 한정적이라 캐시 크기 제한 없음 (LRU 순서 관리 비용도 없음)
+@functools.lru_cache(maxsize=None)
+def _normalize_for_compare(text: str) -> str:
+    return text.strip().lower().translate(_COMPARE_DELETE)
+
+
+def normalize_image_series(s):
+    """이미지 이름 Series 정규화 (normalize_image_name의 벡터화 버전)"""
+    return (
+        s.fillna('').astype(str)
+        .str.strip().str.lower()
+        .str.replace(_EXT_RE, '', regex=True)
+    )
+
+def lower_columns(df, *cols):
+    """지정 컬럼들을 str → strip → lower 처리한 numpy 배열 목록으로 반환
+    
+    iterrows 대신 zip(*lower_columns(...))으로 행을 순회하기 위한 헬퍼.
+    없는 컬럼은 빈 문자열 배열로 채움 (row.get(col, '')과 동일).
+    
+    Args:
+        df: 대상 DataFrame
+        *cols: 컬럼명
+    
+    Returns:
+        list[np.ndarray]: 컬럼별 정규화된 값 배열
+    """
+    arrays = []
+    for col in cols:
+        if col in df.columns:
+            arrays.append(df[col].astype(str).str.strip().str.lower().to_numpy())
+        else:
+            arrays.append(np.full(len(df), '', dtype=object))
+    return arrays
+
+
+def build_normalized_index(df):
+    """비교표 행을 한 번만 정규화 (누락 항목 추가 / 정답률 계산 / 하이라이팅 공용)
+    
+    Args:
+        df: sort_by_category를 거친 비교표 (_cat_for_match 없으면 Cat 사용)
+    
+    Returns:
+        dict:
+            'rows': [(cat, subcat, key, value), ...] strip/lower 된 매칭용 값
+            'raw': [(Cat, Subcat, Key), ...] 표시용 원본 값
+    """
+    cat_col = '_cat_for_match' if '_cat_for_match' in df.columns else 'Cat'
+    subcat_col = '_subcat_for_match' if '_subcat_for_match' in df.columns else 'Subcat'
+    return {
+        'rows': list(zip(*lower_columns(df, cat_col, subcat_col, 'Key', 'Value'))),
+        'raw': list(df.reindex(columns=['Cat', 'Subcat', 'Key'], fill_value='').itertuples(index=False, name=None)),
+    }
 
 # =============================================================================
 # 데이터 로드
 # =============================================================================
 
-@st.cache_data(ttl=1)  # 1초 캐시로 즉시 갱신
-def load_fnf_data(_file_mtime=None):
+def file_key(path: Path):
+    """캐시 키용 파일 상태 (수정 시간 ns, 크기). 파일이 없으면 None.
+
+    stat 한 번으로 존재 확인과 캐시 키를 같이 얻습니다.
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@functools.lru_cache(maxsize=1)
+def excel_engine() -> str:
+    """사용할 엑셀 엔진을 반환합니다. (첫 호출 때 한 번만 확인)
+
+    python-calamine이 설치되어 있으면 'calamine', 아니면 'openpyxl'.
+    """
+    try:
+        import python_calamine  # noqa: F401
+        return 'calamine'
+    except ImportError:
+        return 'openpyxl'
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def open_workbook(path: str, key: tuple, engine: str) -> pd.ExcelFile:
+    """엑셀 워크북을 열어 둡니다. (같은 파일을 여러 번 파싱할 때 재사용)
+
+    파일 내용을 한 번에 메모리로 읽어 두고 바로 닫으므로, 캐시에 남아 있는
+    동안에도 원본 파일 핸들을 잡고 있지 않습니다. (Excel 저장/잠금과 충돌 방지)
+
+    Args:
+        path: 엑셀 파일 경로
+        key: file_key() 값 (파일이 바뀌면 새로 열림)
+        engine: 엑셀 엔진 (예: 'calamine')
+    """
+    return pd.ExcelFile(BytesIO(Path(path).read_bytes()), engine=engine)
+
+
+@st.cache_data(show_spinner=False)
+def load_excel(path: str, key: tuple, usecols: tuple = None, dtype=None) -> pd.DataFrame:
+    """엑셀 파일의 첫 번째 시트를 읽습니다. (경로 + 수정 시간 기준 캐시)
+
+    calamine 엔진으로 읽고, calamine이 거부하는 파일은 openpyxl로 다시 읽습니다.
+
+    Args:
+        path: 엑셀 파일 경로
+        key: file_key() 값 (캐시 키, 파일 변경 시 자동 갱신)
+        usecols: 읽을 컬럼명 (None이면 전체, 없는 컬럼은 무시)
+        dtype: 컬럼 타입 (예: str이면 타입 추론 생략)
+    """
+    kwargs = {'dtype': dtype}
+    if usecols is not None:
+        kwargs['usecols'] = lambda col: col in usecols
+    
+    if excel_engine() == 'calamine':
+        try:
+            return open_workbook(path, key, 'calamine').parse(0, **kwargs)
+        except PermissionError:
+            # 파일 잠금은 엔진과 무관하므로 호출 측에서 처리
+            raise
+        except Exception:
+            pass  # calamine이 거부하는 파일은 openpyxl로
+    return read_xlsx_openpyxl(path, usecols, dtype)
+
+
+def excel_columns(path: str, key: tuple) -> list:
+    """첫 번째 시트의 헤더(컬럼명)만 읽습니다. (본문 파싱 전 스키마 확인용)"""
+    if excel_engine() == 'calamine':
+        try:
+            return list(open_workbook(path, key, 'calamine').parse(0, nrows=0).columns)
+        except PermissionError:
+            raise
+        except Exception:
+            pass
+    
+    from openpyxl import load_workbook
+    
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        return list(next(wb.worksheets[0].iter_rows(values_only=True), ()))
+    finally:
+        wb.close()
+
+
+def read_xlsx_openpyxl(path: str, usecols: tuple = None, dtype=None) -> pd.DataFrame:
+    """openpyxl read_only 모드로 첫 번째 시트를 읽습니다. (calamine 실패 시 대체 경로)
+
+    Cell 객체 없이 값만 순회(iter_rows(values_only=True))하여 바로 DataFrame을 만듭니다.
+    """
+    from openpyxl import load_workbook
+    
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, ())
+        df = pd.DataFrame(rows, columns=header)
+    finally:
+        wb.close()
+    
+    if usecols is not None:
+        df = df[[col for col in df.columns if col in usecols]]
+    if dtype is str:
+        # 빈 셀은 NA로 두고 나머지만 문자열로 (read_excel의 dtype=str과 동일)
+        df = df.astype(TEXT_DTYPE)
+    return df
+
+
+def normalize_text_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """텍스트 컬럼(Cat/Subcat/Key/Value)을 소문자 문자열로 정규화합니다.
+
+    TEXT_DTYPE으로 한 번 변환한 뒤 lower → strip → 빈 값 채우기를 한 번에 처리합니다.
+    이후 비교 코드는 값이 이미 정리되어 있다고 가정합니다.
+    """
+    for col in ['Cat', 'Subcat', 'Key', 'Value']:
+        if col in df.columns:
+            df[col] = df[col].astype(TEXT_DTYPE).str.lower().str.strip().fillna('')
+    return df
+
+
+def sidecar_path(source: Path) -> Path:
+    """엑셀 옆 사이드카 경로 (파일명에 SIDECAR_VERSION 포함 → 이전 버전 사이드카는 읽지 않음)"""
+    return source.with_name(f"{source.stem}.v{SIDECAR_VERSION}.parquet")
+
+
+def read_sidecar(source: Path, key: tuple):
+    """엑셀 옆의 .parquet 사이드카(정규화까지 끝난 데이터)를 읽습니다.
+
+    현재 버전의 사이드카가 없거나 엑셀보다 오래됐거나 읽을 수 없으면 None을 반환합니다.
+
+    Args:
+        source: 원본 엑셀 경로
+        key: 원본의 file_key() 값 (엑셀 stat을 다시 하지 않음)
+    """
+    sidecar = sidecar_path(source)
+    try:
+        if sidecar.stat().st_mtime_ns < key[0]:
+            return None
+        return pd.read_parquet(sidecar)
+    except FileNotFoundError:
+        return None
+    except _SIDECAR_ERRORS as e:
+        print(f"⚠️ 사이드카를 읽지 못해 엑셀을 다시 읽습니다 ({sidecar.name}): {e}", file=sys.stderr)
+        return None
+
+
+def write_sidecar(df: pd.DataFrame, source: Path):
+    """정규화된 데이터를 엑셀 옆에 .parquet 사이드카로 저장합니다. (실패하면 경고만 남김)"""
+    sidecar = sidecar_path(source)
+    try:
+        df.to_parquet(sidecar, compression='zstd', index=False)
+    except _SIDECAR_ERRORS as e:
+        print(f"⚠️ 사이드카 저장 실패 ({sidecar.name}): {e}", file=sys.stderr)
+
+
+@st.cache_data(show_spinner=False)
+def load_fnf_data(key=None):
     """F&F 정답지를 로드합니다.
     
     Args:
-        _file_mtime: 파일 수정 시간 (캐시 무효화용)
+        key: file_key(FNF_FILE) 값 (파일이 바뀔 때만 다시 읽음)
     """
-    if not FNF_FILE.exists():
+    if key is None:
+        key = file_key(FNF_FILE)
+    if key is None:
         return None, f"F&F 정답지 파일을 찾을 수 없습니다: {FNF_FILE}"
     
     try:
-        df = pd.read_excel(FNF_FILE)
+        # 사이드카가 최신이면 엑셀 파싱/정규화 생략
+        df = read_sidecar(FNF_FILE, key)
+        if df is not None:
+            return df, None
         
-        # 필수 컬럼 확인
+        # 필수 컬럼 확인 (헤더만 읽어서 본문 파싱 전에 확인)
         required_cols = ['Image', 'Cat', 'Subcat', 'Key', 'Value']
-        if not all(col in df.columns for col in required_cols):
+        if not set(required_cols).issubset(excel_columns(str(FNF_FILE), key)):
             return None, f"필수 컬럼이 없습니다. 필요: {required_cols}"
         
+        # 필요한 컬럼만 문자열로 읽기 (나머지 컬럼은 파싱하지 않음)
+        df = load_excel(str(FNF_FILE), key, usecols=tuple(required_cols), dtype=str)
+        
         # 이미지 컬럼 ffill (그룹 첫 행의 이미지명을 아래로 채움)
         df['Image'] = df['Image'].ffill()
         
         # 모든 값 소문자로 통일 (Cat 비교를 위해)
-        for col in ['Cat', 'Subcat', 'Key', 'Value']:
-            if col in df.columns:
-                df[col] = df[col].fillna('').astype(str).str.lower()
+        df = normalize_text_columns(df)
         
-        return df[required_cols], None
+        write_sidecar(df, FNF_FILE)
+        return df, None
         
     except Exception as e:
         return None, str(e)
 
 
-@st.cache_data(ttl=1)  # 1초 캐시로 즉시 갱신
-def load_oddconcept_data(_file_mtime=None):
+@st.cache_data(show_spinner=False)
+def load_oddconcept_data(key=None):
     """오드컨셉 결과를 로드합니다.
     
     Args:
-        _file_mtime: 파일 수정 시간 (캐시 무효화용)
+        key: file_key(ODDCONCEPT_FILE) 값 (파일이 바뀔 때만 다시 읽음)
     """
-    if not ODDCONCEPT_FILE.exists():
+    if key is None:
+        key = file_key(ODDCONCEPT_FILE)
+    if key is None:
         return None, f"오드컨셉 결과 파일을 찾을 수 없습니다: {ODDCONCEPT_FILE}"
     
     try:
-        df = pd.read_excel(ODDCONCEPT_FILE)
+        # 사이드카가 최신이면 엑셀 파싱/정규화 생략
+        df = read_sidecar(ODDCONCEPT_FILE, key)
+        if df is not None:
+            return df, None
         
-        # 필수 컬럼 확인
+        # 필수 컬럼 확인 (헤더만 읽어서 본문 파싱 전에 확인)
         required_cols = ['Image', 'Cat', 'Subcat', 'Key', 'Value']
-        if not all(col in df.columns for col in required_cols):
+        if not set(required_cols).issubset(excel_columns(str(ODDCONCEPT_FILE), key)):
             return None, f"필수 컬럼이 없습니다. 필요: {required_cols}"
         
+        # 필요한 컬럼만 문자열로 읽기 (나머지 컬럼은 파싱하지 않음)
+        df = load_excel(str(ODDCONCEPT_FILE), key, usecols=tuple(required_cols), dtype=str)
+        
         # 이미지 컬럼 ffill (그룹 첫 행의 이미지명을 아래로 채움)
         df['Image'] = df['Image'].ffill()
         
         # 모든 값 소문자로 통일 (Cat 비교를 위해)
-        for col in ['Cat', 'Subcat', 'Key', 'Value']:
-            if col in df.columns:
-                df[col] = df[col].fillna('').astype(str).str.lower()
+        df = normalize_text_columns(df)
         
-        return df[required_cols], None
+        write_sidecar(df, ODDCONCEPT_FILE)
+        return df, None
         
     except Exception as e:
         return None, str(e)
 
 
-def load_gemini_results():
-    """vlm_test.py 실행 결과 (최신 Gemini 분석)를 로드합니다."""
-    OUTPUT_DIR.mkdir(exist_ok=True)
+@st.cache_data(show_spinner=False)
+def read_gemini_file(path_str: str, key: tuple) -> pd.DataFrame:
+    """Gemini 결과 파일 하나를 읽고 정규화합니다. (사이드카 우선)
+
+    Args:
+        path_str: 결과 파일 경로
+        key: file_key() 값 (파일이 바뀔 때만 다시 읽음)
+    """
+    path = Path(path_str)
+    df = read_sidecar(path, key)
+    if df is not None:
+        return df
+    
+    df = load_excel(path_str, key)
+    # 컬럼명 정리
+    if 'Image' in df.columns:
+        df = df.rename(columns={'Image': 'Image_Name'})
+    
+    # 모든 값 소문자로 통일 (Cat 비교를 위해)
+    df = normalize_text_columns(df)
     
+    write_sidecar(df, path)
+    return df
+
+
+def gemini_result_files():
+    """Gemini 결과 파일 목록을 최신순으로 반환합니다. (캐시 없음, glob만 수행)"""
+    OUTPUT_DIR.mkdir(exist_ok=True)
+    return sorted(OUTPUT_DIR.glob("vlm_analysis_result_*.xlsx"), reverse=True)
+
+
+def load_gemini_results():
+    """vlm_test.py 실행 결과 (최신 Gemini 분석)를 로드합니다.
+
+    파일 찾기는 매번 하지만, 파싱은 파일이 바뀔 때만 다시 합니다.
+    """
     # 최신 결과 파일 찾기
-    result_files = sorted(OUTPUT_DIR.glob("vlm_analysis_result_*.xlsx"), reverse=True)
+    result_files = gemini_result_files()
     
     if not result_files:
         return None, None
@@ -119,31 +410,12 @@ def load_gemini_results():
     latest_file = result_files[0]
     
     try:
-        df = pd.read_excel(latest_file)
-        # 컬럼명 정리
-        if 'Image' in df.columns:
-            df = df.rename(columns={'Image': 'Image_Name'})
-        
-        # 모든 값 소문자로 통일 (Cat 비교를 위해)
-        for col in ['Cat', 'Subcat', 'Key', 'Value']:
-            if col in df.columns:
-                df[col] = df[col].fillna('').astype(str).str.lower()
-        
-        return df, latest_file.name
+        return read_gemini_file(str(latest_file), file_key(latest_file)), latest_file.name
     except PermissionError:
         # 파일이 열려있으면 이전 파일 시도
         if len(result_files) > 1:
             try:
-                df = pd.read_excel(result_files[1])
-                if 'Image' in df.columns:
-                    df = df.rename(columns={'Image': 'Image_Name'})
-                
-                # 모든 값 소문자로 통일
-                for col in ['Cat', 'Subcat', 'Key', 'Value']:
-                    if col in df.columns:
-                        df[col] = df[col].fillna('').astype(str).str.lower()
-                
-                return df, result_files[1].name + " (이전 버전)"
+                return read_gemini_file(str(result_files[1]), file_key(result_files[1])), result_files[1].name + " (이전 버전)"
             except:
                 pass
         return None, "파일 열려있음"
@@ -151,16 +423,15 @@ def load_gemini_results():
         return None, str(e)
 
 
-@st.cache_data
-def load_data(_fnf_mtime=None, _oddconcept_mtime=None):
+def load_data(fnf_key=None, oddconcept_key=None):
     """모든 비교 데이터를 로드합니다.
     
     Args:
-        _fnf_mtime: F&F 파일 수정 시간 (캐시 무효화용)
-        _oddconcept_mtime: 오드컨셉 파일 수정 시간 (캐시 무효화용)
+        fnf_key: file_key(FNF_FILE) 값 (캐시 무효화용)
+        oddconcept_key: file_key(ODDCONCEPT_FILE) 값 (캐시 무효화용)
     """
     # F&F 정답지 로드
-    df_fnf, fnf_error = load_fnf_data(_fnf_mtime)
+    df_fnf, fnf_error = load_fnf_data(fnf_key)
     if fnf_error:
         return None, None, None, f"F&F 로드 실패: {fnf_error}"
     
@@ -170,73 +441,55 @@ def load_data(_fnf_mtime=None, _oddconcept_mtime=None):
         df_gemini = pd.DataFrame(columns=['Image', 'Cat', 'Subcat', 'Key', 'Value'])
     
     # 오드컨셉 결과 로드
-    df_oddconcept, odd_error = load_oddconcept_data(_oddconcept_mtime)
+    df_oddconcept, odd_error = load_oddconcept_data(oddconcept_key)
     if odd_error:
         return None, None, None, f"오드컨셉 로드 실패: {odd_error}"
     
     return df_fnf, df_gemini, df_oddconcept, None
 
 
+# 일치 여부 코드 (0: 정답 없음, 1: 일치, 2: 불일치)
+MATCH_NONE, MATCH_OK, MATCH_DIFF = 0, 1, 2
+
+
+def frame_fingerprint(df: pd.DataFrame):
+    """st.cache_data용 DataFrame 해시 (행 수 + 컬럼 + 내용 해시 합)"""
+    return len(df), tuple(df.columns), int(pd.util.hash_pandas_object(df, index=False).sum())
+
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: frame_fingerprint})
 def merge_comparison_data(df_fnf, df_gemini, df_oddconcept):
-    """3개 VLM 결과를 Key 기준으로 merge하여 한 테이블로 만듭니다."""
-    
-    # 각 DataFrame에 소스 표시 및 정리
-    df_fnf_clean = df_fnf.copy()
-    df_gemini_clean = df_gemini.copy()
-    df_oddconcept_clean = df_oddconcept.copy()
-    
-    # 인덱스 생성 (행 번호)
-    df_fnf_clean['row_idx'] = range(len(df_fnf_clean))
-    df_gemini_clean['row_idx'] = range(len(df_gemini_clean))
-    df_oddconcept_clean['row_idx'] = range(len(df_oddconcept_clean))
-    
-    # 컬럼명 변경
-    df_fnf_clean = df_fnf_clean.rename(columns={
-        'Cat': 'Cat',
-        'Subcat': 'Subcat', 
-        'Key': 'Key',
-        'Value': 'F&F 정답'
-    })
-    
-    df_gemini_clean = df_gemini_clean.rename(columns={
-        'Value': 'Gemini'
-    })
-    
-    df_oddconcept_clean = df_oddconcept_clean.rename(columns={
-        'Value': '오드컨셉'
-    })
-    
-    # row_idx 기준으로 merge (행 번호 맞춤)
-    merged = df_fnf_clean[['row_idx', 'Cat', 'Subcat', 'Key', 'F&F 정답']].copy()
+    """3개 VLM 결과를 Key 기준으로 merge하여 한 테이블로 만듭니다.
+
+    'Gemini 일치' / '오드컨셉 일치'는 int8 코드(MATCH_*)입니다.
+    """
     
-    # Gemini 값 추가
-    if 'Gemini' in df_gemini_clean.columns:
-        gemini_vals = df_gemini_clean[['row_idx', 'Gemini']].copy()
-        merged = merged.merge(gemini_vals, on='row_idx', how='left')
-    else:
-        merged['Gemini'] = ''
+    n = len(df_fnf)
     
-    # 오드컨셉 값 추가
-    if '오드컨셉' in df_oddconcept_clean.columns:
-        odd_vals = df_oddconcept_clean[['row_idx', '오드컨셉']].copy()
-        merged = merged.merge(odd_vals, on='row_idx', how='left')
-    else:
-        merged['오드컨셉'] = ''
+    def positional_values(df):
+        """Value 컬럼을 F&F 행 수(n)에 맞춰 자르거나 ''로 채운 배열 (행 번호 기준 정렬)"""
+        if 'Value' not in df.columns:
+            return np.full(n, '', dtype=object)
+        values = df['Value'].to_numpy(dtype=object)[:n]
+        return np.concatenate([values, np.full(n - len(values), '', dtype=object)])
     
-    # 일치 여부 계산
-    merged['Gemini 일치'] = merged.apply(
-        lambda row: '✅' if str(row['F&F 정답']).strip() == str(row['Gemini']).strip() and str(row['F&F 정답']).strip() else 
-                    ('⚠️' if pd.notna(row['F&F 정답']) and str(row['F&F 정답']).strip() else ''),
-        axis=1
-    )
-    merged['오드컨셉 일치'] = merged.apply(
-        lambda row: '✅' if str(row['F&F 정답']).strip() == str(row['오드컨셉']).strip() and str(row['F&F 정답']).strip() else 
-                    ('⚠️' if pd.notna(row['F&F 정답']) and str(row['F&F 정답']).strip() else ''),
-        axis=1
-    )
+    # 열 배열을 모아 한 번에 생성 (중간 DataFrame 복사 없음)
+    merged = pd.DataFrame({
+        'Cat': df_fnf['Cat'].to_numpy(),
+        'Subcat': df_fnf['Subcat'].to_numpy(),
+        'Key': df_fnf['Key'].to_numpy(),
+        'F&F 정답': df_fnf['Value'].to_numpy(),
+        'Gemini': positional_values(df_gemini),
+        '오드컨셉': positional_values(df_oddconcept),
+    })
     
-    # row_idx 제거
-    merged = merged.drop(columns=['row_idx'])
+    # 일치 여부 계산 (MATCH_* 코드)
+    fnf_s = merged['F&F 정답'].fillna('').astype(str).str.strip()
+    gem_s = merged['Gemini'].astype(str).str.strip()
+    odd_s = merged['오드컨셉'].astype(str).str.strip()
+    has_truth = fnf_s.ne('').to_numpy()
+    merged['Gemini 일치'] = np.where(~has_truth, MATCH_NONE, np.where(fnf_s == gem_s, MATCH_OK, MATCH_DIFF)).astype('int8')
+    merged['오드컨셉 일치'] = np.where(~has_truth, MATCH_NONE, np.where(fnf_s == odd_s, MATCH_OK, MATCH_DIFF)).astype('int8')
     
     # NaN을 빈 문자열로
     merged = merged.fillna('')
@@ -244,6 +497,22 @@ def merge_comparison_data(df_fnf, df_gemini, df_oddconcept):
     return merged
 
 
+def match_rate(truth: pd.Series, pred: pd.Series) -> float:
+    """두 Value 컬럼의 행 번호 기준 일치율(%)을 계산합니다.
+
+    pyarrow가 있으면 Arrow equal 커널로 UTF-8 버퍼를 직접 비교합니다.
+    """
+    n = min(len(truth), len(pred))
+    if not n:
+        return 0
+    if pc is not None:
+        matches = pc.sum(pc.equal(pa.array(truth.iloc[:n]), pa.array(pred.iloc[:n]))).as_py() or 0
+    else:
+        matches = (truth.to_numpy()[:n] == pred.to_numpy()[:n]).sum()
+    return matches * 100.0 / n
+
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: frame_fingerprint})
 def calculate_stats(df_fnf, df_gemini, df_oddconcept):
     """일치율 통계를 계산합니다."""
     stats = {}
@@ -257,41 +526,924 @@ def calculate_stats(df_fnf, df_gemini, df_oddconcept):
         stats['match_count'] = (match_col == 'O').sum()
         stats['match_rate'] = stats['match_count'] / stats['total_items'] * 100 if stats['total_items'] > 0 else 0
     
-    # Value 비교로 일치율 계산
-    fnf_vals = df_fnf['Value'].fillna('').astype(str).str.strip()
-    
-    # Gemini 일치율
+    # Value 비교로 일치율 계산 (로더에서 이미 소문자/strip/빈 값 처리됨)
     if len(df_gemini) > 0 and 'Value' in df_gemini.columns:
-        gemini_vals = df_gemini['Value'].fillna('').astype(str).str.strip()
-        min_len = min(len(fnf_vals), len(gemini_vals))
-        if min_len > 0:
-            gemini_match = (fnf_vals[:min_len].values == gemini_vals[:min_len].values).sum()
-            stats['gemini_match_rate'] = gemini_match / min_len * 100
-        else:
-            stats['gemini_match_rate'] = 0
+        stats['gemini_match_rate'] = match_rate(df_fnf['Value'], df_gemini['Value'])
     else:
         stats['gemini_match_rate'] = 0
     
-    # 오드컨셉 일치율
     if len(df_oddconcept) > 0 and 'Value' in df_oddconcept.columns:
-        oddconcept_vals = df_oddconcept['Value'].fillna('').astype(str).str.strip()
-        min_len = min(len(fnf_vals), len(oddconcept_vals))
-        if min_len > 0:
-            oddconcept_match = (fnf_vals[:min_len].values == oddconcept_vals[:min_len].values).sum()
-            stats['oddconcept_match_rate'] = oddconcept_match / min_len * 100
-        else:
-            stats['oddconcept_match_rate'] = 0
+        stats['oddconcept_match_rate'] = match_rate(df_fnf['Value'], df_oddconcept['Value'])
     else:
         stats['oddconcept_match_rate'] = 0
     
     # 카테고리별 통계
-    categories = df_fnf['Cat'].dropna().unique()
-    stats['categories'] = [c for c in categories if pd.notna(c) and str(c).strip()]
+    if pc is not None:
+        categories = pc.unique(pa.array(df_fnf['Cat'])).to_pylist()
+    else:
+        categories = df_fnf['Cat'].unique().tolist()
+    stats['categories'] = [c for c in categories if c and c.strip()]
     stats['category_count'] = len(stats['categories'])
     
     return stats
 
 
+# =============================================================================
+# 이미지별 비교표 전처리
+# =============================================================================
+
+# 빈 값으로 취급할 문자열
+_NONE_VALUES = {
+    'None': '', 'none': '', 'nan': '', 'NaN': '',
+    'N/A': '', 'n/a': '', 'null': '', 'NULL': '',
+    '/': ''  # 오드컨셉의 빈 Subcat 처리
+}
+
+
+# None 값 정리 함수 + 소문자 통일
+def clean_none_values(df):
+    # 프레임 전체를 한 번에 문자열 변환 → 빈 값 치환
+    df_clean = df.fillna('').astype(str).replace(_NONE_VALUES)
+    # 모든 값 소문자로 통일 (numpy C 루프로 전체 배열 한 번에)
+    arr = np.char.lower(df_clean.to_numpy(dtype=str))
+    return pd.DataFrame(arr, columns=df.columns, index=df.index, dtype=object)
+
+
+# 카테고리 정렬 순서 정의 (마케팅 → Outer → Inner → Bottom → Shoes → 나머지)
+CAT_ORDER = {
+    # 마케팅 관련 (먼저)
+    'age group': 1, 'color tone filter': 2, 'coordination method': 3,
+    'gender': 4, 'skin tone': 5, 'pose': 6, 'hair style': 7,
+    'expression': 8, 'gaze direction': 9, 'fashion style': 10,
+    'location': 11, 'mood': 12,
+    'number of people': 13, 'overall fashion color tone': 14,
+    'season weather': 15, 'shooting composition': 16,
+    # 상품 카테고리 순서
+    'outer': 20, 'inner': 21, 'bottom': 22, 'shoes': 23,
+    'bag': 24, 'accessories': 25, 'neckwear': 26, 'headwear': 27,
+    'eyewear': 28, 'hosiery': 29, 'onepiece': 30, 'swimwear': 31
+}
+CAT_ORDER_DEFAULT = 100  # 목록에 없는 Cat
+CAT_ORDER_BLANK = 999  # Cat이 빈 행 (맨 뒤)
+
+
+def get_cat_order(cat_val):
+    cat_lower = str(cat_val).strip().lower()
+    return CAT_ORDER.get(cat_lower, CAT_ORDER_DEFAULT)
+
+
+# 정렬 전 값 정리 (None 값 정리 + Cat/Subcat 첫 번째 값만)
+def clean_category_frame(df_raw):
+    df = df_raw.copy()
+    df = clean_none_values(df)
+    
+    # 0. Cat과 Subcat에 쉼표가 있으면 첫 번째 값만 사용 (표시용)
+    # clean_none_values 이후라 모든 값이 문자열 (빈 값은 '')
+    for col in ('Cat', 'Subcat'):
+        df[col] = df[col].str.split(',', n=1).str[0].str.strip()
+    return df
+
+
+# 빈 문자열 forward-fill (replace('', NA).ffill().fillna('')와 동일, 중간 Series 없음)
+def ffill_blank(s):
+    vals = s.to_numpy(dtype=object)
+    idx = np.where(vals != '', np.arange(len(vals)), 0)
+    np.maximum.accumulate(idx, out=idx)
+    return vals[idx]
+
+
+# 정렬 함수 (3개 테이블 모두 적용)
+def sort_by_category(df_raw, cleaned=False):
+    """Cat 순서대로 정렬하고 같은 Cat/Subcat 그룹은 첫 행만 표시
+    
+    Args:
+        df_raw: 정렬할 DataFrame
+        cleaned: True면 이미 clean_category_frame을 거친 것으로 보고 정리 단계 생략
+    """
+    if len(df_raw) == 0:
+        # 빈 테이블은 정렬할 것이 없으므로 결과 컬럼만 맞춰서 반환
+        return pd.DataFrame(columns=list(dict.fromkeys([*df_raw.columns, '_cat_for_match', '_subcat_for_match'])), dtype=object)
+    
+    df = df_raw if cleaned else clean_category_frame(df_raw)
+    
+    # 1. 마케팅 카테고리 구분 (Key가 없으면 마케팅)
+    df['_is_marketing'] = (df['Key'] == '').astype(np.int8)
+    
+    # 2. 정렬용으로 Cat/Subcat을 ffill (그룹 유지) - 하이라이트용 숨김 컬럼에 바로 저장
+    df['_cat_for_match'] = ffill_blank(df['Cat'])
+    df['_subcat_for_match'] = ffill_blank(df['Subcat'])
+    
+    # 마케팅 행은 _subcat_for_match를 강제로 빈칸으로 (ffill 무시)
+    df.loc[df['_is_marketing'] == 1, '_subcat_for_match'] = ''
+    
+    # 3. 정렬 (마케팅은 먼저, 그 다음 의류)
+    # clean_none_values에서 이미 strip/lower 된 값이라 dict 매핑으로 바로 순서 조회, Subcat/Key도 그대로 정렬
+    cat_filled = df['_cat_for_match']
+    df['_cat_order'] = (
+        cat_filled.map(CAT_ORDER).fillna(CAT_ORDER_DEFAULT)
+        .where(cat_filled != '', CAT_ORDER_BLANK)
+        .astype(np.int16)
+    )
+    
+    df = df.sort_values(['_cat_order', '_is_marketing', '_subcat_for_match', 'Key'], ascending=[True, False, True, True]).reset_index(drop=True)
+    
+    # 3. 정렬 후, 같은 Cat/Subcat 그룹에서 첫 행만 값 유지하고 나머지는 빈칸으로
+    first_in_group = (
+        df['_cat_for_match'].ne(df['_cat_for_match'].shift())
+        | df['_subcat_for_match'].ne(df['_subcat_for_match'].shift())
+    )
+    df['Cat'] = df['_cat_for_match'].where(first_in_group, '')
+    # 마케팅 카테고리는 Subcat 무조건 빈칸
+    df['Subcat'] = np.where(df['_is_marketing'] == 1, '', df['_subcat_for_match'].where(first_in_group, ''))
+    
+    # 4. 임시 컬럼 제거 (매칭용은 남김, _is_missing과 _is_key_only_missing은 유지)
+    return df.drop(columns=['_cat_order', '_is_marketing'])
+
+
+# === VLM 결과에서 중복 제거 함수 ===
+def remove_duplicates(vlm_df):
+    """같은 (Cat, Subcat, Key) 조합이 중복되면 첫 번째만 유지"""
+    if len(vlm_df) == 0:
+        return vlm_df
+    
+    # (Cat, Subcat, Key)를 정규화해 하나의 문자열 키로 합침 (임시 컬럼/복사 없이)
+    cat_col = '_cat_for_match' if '_cat_for_match' in vlm_df.columns else 'Cat'
+    subcat_col = '_subcat_for_match' if '_subcat_for_match' in vlm_df.columns else 'Subcat'
+    cats, subcats, keys = lower_columns(vlm_df, cat_col, subcat_col, 'Key')
+    composite = pd.Series(cats + '\x1f' + subcats + '\x1f' + keys).str.translate(_COMPARE_DELETE)
+    
+    # 조합 키 기준으로 중복 제거 (첫 번째만 유지)
+    keep = ~composite.duplicated(keep='first').to_numpy()
+    return vlm_df[keep].reset_index(drop=True)
+
+
+# === F&F 정답지에 있는 항목 중 누락된 것 추가 ===
+@functools.lru_cache(maxsize=None)
+def match_word_set(text, with_phrase=False, strip_plural=True) -> frozenset:
+    """쉼표/공백 기준으로 나눈 정규화 단어 집합 (복수형 s 제거)
+    
+    Args:
+        text: Cat / Subcat / Value 값 (문자열)
+        with_phrase: True면 쉼표 구간 전체 문구도 포함 (t shirt → tshirt)
+        strip_plural: True면 단어 끝의 s 제거 (Value 비교는 False)
+    
+    Returns:
+        frozenset: 단어 집합 (값이 비어 있으면 빈 집합)
+            단어는 sys.intern으로 같은 객체를 공유하므로 집합 비교 시 동일성 비교로 끝남
+    """
+    words = set()
+    if not text or not text.strip():
+        return frozenset()
+    
+    for v in text.split(','):
+        v = v.strip().lower()
+        if with_phrase:
+            full_normalized = _normalize_for_compare(v)
+            if strip_plural:
+                full_normalized = full_normalized.rstrip('s')
+            if full_normalized:
+                words.add(sys.intern(full_normalized))
+        for word in v.split():
+            normalized = _normalize_for_compare(word)
+            if strip_plural:
+                normalized = normalized.rstrip('s')
+            if normalized:
+                words.add(sys.intern(normalized))
+    return frozenset(words)
+
+
+def add_missing_items(vlm_df, fnf_df, fnf_index=None):
+    """F&F에는 있지만 VLM에 없는 항목을 빈 값으로 추가
+    
+    fnf_index: build_normalized_index(fnf_df) 결과 (여러 VLM에 같은 정답지를 쓸 때 재사용)
+    """
+    if len(fnf_df) == 0:
+        return vlm_df  # 정답지가 비어 있으면 추가할 항목 없음
+    
+    # VLM에 있는 항목들을 리스트로 저장 (원본 cat, subcat 포함)
+    vlm_items_list = []
+    vlm_by_catword = {}  # Cat 단어 → vlm_items_list 인덱스 (단어가 겹치는 항목만 비교하기 위한 색인)
+    
+    # str/strip/lower는 컬럼 단위로 한 번에 (행마다 반복하지 않음)
+    vlm_cat_col = '_cat_for_match' if '_cat_for_match' in vlm_df.columns else 'Cat'
+    vlm_subcat_col = '_subcat_for_match' if '_subcat_for_match' in vlm_df.columns else 'Subcat'
+    
+    for cat_orig, subcat_orig, key_orig in zip(*lower_columns(vlm_df, vlm_cat_col, vlm_subcat_col, 'Key')):
+        # 이미 strip/lower 된 값이라 normalize_for_compare는 translate 한 번과 동일
+        cat = cat_orig.translate(_COMPARE_DELETE)
+        subcat = subcat_orig.translate(_COMPARE_DELETE)
+        key = key_orig.translate(_COMPARE_DELETE)
+        if cat or key:  # 빈 항목 제외
+            cat_words = match_word_set(cat_orig)
+            for word in cat_words:
+                vlm_by_catword.setdefault(word, []).append(len(vlm_items_list))
+            vlm_items_list.append({
+                'cat': cat,
+                'cat_orig': cat_orig,  # 단어 매칭용
+                'subcat': subcat,
+                'subcat_orig': subcat_orig,
+                'cat_words': cat_words,  # 단어 매칭용
+                'subcat_words': match_word_set(subcat_orig, with_phrase=True),  # 단어 매칭용
+                'key': key
+            })
+    
+    # F&F에는 있지만 VLM에 없는 항목 찾기
+    missing_rows = []
+    added_items = set()  # 이미 추가한 항목 추적 (중복 방지)
+    
+    if fnf_index is None:
+        fnf_index = build_normalized_index(fnf_df)
+    
+    for (cat_orig, subcat_orig, key_orig, _), (cat_raw, subcat_raw, key_raw) in zip(fnf_index['rows'], fnf_index['raw']):
+        
+        # 정규화된 값 (strip/lower 된 값 → 하이픈/공백/언더스코어 제거만)
+        cat = cat_orig.translate(_COMPARE_DELETE)
+        subcat = subcat_orig.translate(_COMPARE_DELETE)
+        key = key_orig.translate(_COMPARE_DELETE)
+        
+        # 이미 추가한 항목이면 스킵
+        if (cat, subcat, key) in added_items:
+            continue
+        
+        # 단어 집합 (VLM 항목과 비교할 때마다 다시 나누지 않도록 한 번만 계산)
+        cat_words = match_word_set(cat_orig)
+        subcat_words = match_word_set(subcat_orig, with_phrase=True)
+        
+        # Cat 단어가 하나라도 겹치는 VLM 항목만 후보로 (원래 순서 유지)
+        candidate_idx = set()
+        for word in cat_words:
+            candidate_idx.update(vlm_by_catword.get(word, ()))
+        cat_candidates = [vlm_items_list[i] for i in sorted(candidate_idx)]
+        
+        # 마케팅 항목인지 확인 (Key가 없으면 마케팅)
+        is_marketing = not key
+        
+        # VLM에서 같은 항목 찾기
+        found_match = False
+        is_key_only_missing = False
+        matching_vlm_subcats = []
+        has_same_cat = False
+        
+        if is_marketing:
+            # 마케팅 항목: Cat만 단어 단위로 비교
+            for vlm_item in cat_candidates:
+                if not vlm_item['key']:
+                    # Cat이 단어 단위로 일치하고 둘 다 마케팅 항목(key 없음)
+                    found_match = True
+                    has_same_cat = True
+                    break
+            
+            # ⚠️ 마케팅 항목에서 Cat 자체가 없으면 전체 행 빨간색
+            if not has_same_cat:
+                is_key_only_missing = False
+        else:
+            # 상품 항목: Cat + Subcat + Key 비교 (Cat도 단어 단위)
+            for vlm_item in cat_candidates:
+                has_same_cat = True  # Cat은 단어 단위로 존재
+                # Cat이 같을 때, Subcat이 단어 단위로 일치하는지 체크 (fuzzy_match_subcat과 동일, t shirt ↔ t-shirt)
+                if not subcat_words.isdisjoint(vlm_item['subcat_words']):
+                    matching_vlm_subcats.append(vlm_item)
+            
+            if matching_vlm_subcats:
+                # Subcat이 단어 단위로 일치하는 항목이 VLM에 존재
+                # 이제 Key가 있는지 체크
+                for vlm_item in matching_vlm_subcats:
+                    if vlm_item['key'] == key:
+                        # Key도 일치: 완전 일치
+                        found_match = True
+                        break
+                
+                # Key가 없으면 Key만 누락
+                if not found_match:
+                    is_key_only_missing = True
+            
+            # ⚠️ Cat 자체가 VLM에 없으면 Key만 누락이 아님 (전체 Cat-Subcat 누락)
+            if not has_same_cat:
+                is_key_only_missing = False
+        
+        # 누락된 항목인 경우에만 추가
+        # 조건: cat이 있어야 하고, (마케팅은 key 없음 OR 상품은 key 있음)
+        is_valid_item = cat and (is_marketing or key)  # cat 필수, 마케팅이거나 key 있어야 함
+        
+        if not found_match and is_valid_item:
+            # 🆕 상품 항목: VLM이 같은 Cat을 이미 분석했다면 (다른 Subcat이라도)
+            # Subcat이 다른 것은 누락으로 추가하지 않음 (하이라이팅에서 처리)
+            if not is_marketing and has_same_cat and not matching_vlm_subcats and subcat:
+                # VLM이 Cat은 인식했지만 Subcat이 완전히 다름
+                # → 누락 추가 안 함 (VLM의 Subcat이 틀렸다고 빨간색 표시만)
+                continue
+            
+            # 누락된 항목 추가
+            # Cat/Subcat이 빈값이면 _cat_for_match/_subcat_for_match 사용
+            cat_display = cat_raw
+            subcat_display = subcat_raw
+            if not cat_display or str(cat_display).strip() == '':
+                cat_display = cat_orig
+            if not subcat_display or str(subcat_display).strip() == '':
+                subcat_display = subcat_orig
+            
+            # ⚠️ Key만 누락인 경우, VLM에 이미 있는 Subcat을 사용
+            if is_key_only_missing and matching_vlm_subcats:
+                # VLM의 Subcat을 사용 (단어 일치하는 첫 번째 항목)
+                vlm_subcat_orig = matching_vlm_subcats[0]['subcat_orig']
+                subcat_display = vlm_subcat_orig
+                subcat_for_match = vlm_subcat_orig
+            else:
+                subcat_for_match = subcat_orig
+            
+            missing_rows.append({
+                'Cat': cat_display,
+                'Subcat': subcat_display,
+                'Key': key_raw,
+                'Value': '',  # 빈 값
+                '_cat_for_match': cat_orig,
+                '_subcat_for_match': subcat_for_match,
+                '_is_missing': True,  # 누락 표시
+                '_is_key_only_missing': is_key_only_missing  # Key만 누락인지
+            })
+            added_items.add((cat, subcat, key))
+    
+    if missing_rows:
+        # 새로 추가하는 행만 정리 (기존 행은 이미 정리됨 → 빈 값 치환만 다시 적용)
+        missing_df = clean_category_frame(pd.DataFrame(missing_rows))
+        vlm_df_updated = pd.concat([vlm_df.replace(_NONE_VALUES), missing_df], ignore_index=True).fillna('')
+        # 누락 플래그는 bool로 통일 (clean_category_frame을 거치면 'true'/'false' 문자열, 기존 행은 '')
+        for flag_col in ('_is_missing', '_is_key_only_missing'):
+            vlm_df_updated[flag_col] = vlm_df_updated[flag_col].eq('true')
+        # 다시 정렬
+        return sort_by_category(vlm_df_updated, cleaned=True)
+    return vlm_df
+
+
+@st.cache_data(show_spinner=False)
+def image_row_groups(version, _df) -> dict:
+    """정규화된 이미지 이름 → 행 위치 배열 (DataFrame 전체를 한 번만 정규화)
+
+    Args:
+        version: frame_fingerprint(_df) 값 (캐시 키)
+        _df: Image 컬럼이 있는 DataFrame (캐시 키에서 제외)
+    """
+    norm = normalize_image_series(_df['Image']).reset_index(drop=True)
+    return norm.groupby(norm, sort=False).indices
+
+
+@st.cache_data(show_spinner=False)
+def prepare_image_tables(image_name, img_col, data_version, _df_fnf, _df_gemini, _df_oddconcept):
+    """이미지 한 장의 F&F / Gemini / 오드컨셉 비교표를 만듭니다.
+
+    정렬 → 중복 제거 → 누락 항목 추가까지 수행하며, 결과는 이미지 이름과
+    data_version(세 DataFrame의 fingerprint) 기준으로 캐시됩니다.
+
+    Args:
+        image_name: Gemini 결과의 이미지 이름
+        img_col: Gemini 결과의 이미지 컬럼명
+        data_version: 세 DataFrame의 frame_fingerprint() 튜플 (캐시 키)
+        _df_fnf, _df_gemini, _df_oddconcept: 전체 데이터 (캐시 키에서 제외)
+
+    Returns:
+        (df_fnf_img, df_gemini_clean, df_odd_img)
+    """
+    # 해당 이미지의 Gemini 데이터 필터링
+    df_gemini_img = _df_gemini[_df_gemini[img_col] == image_name]
+    
+    # 이미지 이름 정규화하여 F&F, 오드컨셉 데이터 필터링 (미리 만든 행 인덱스 사용)
+    normalized_img_name = normalize_image_name(image_name)
+    fnf_rows = image_row_groups(data_version[0], _df_fnf).get(normalized_img_name, [])
+    odd_rows = image_row_groups(data_version[2], _df_oddconcept).get(normalized_img_name, [])
+    df_fnf_filtered = _df_fnf.iloc[fnf_rows]
+    df_odd_filtered = _df_oddconcept.iloc[odd_rows]
+    
+    # F&F 정답지 정렬 (이미지 이름으로 필터링된 데이터 사용)
+    df_fnf_raw = df_fnf_filtered[['Cat', 'Subcat', 'Key', 'Value']].copy()
+    df_fnf_img = sort_by_category(df_fnf_raw)
+    
+    # 오드컨셉 정렬 및 중복 제거
+    df_odd_raw = df_odd_filtered[['Cat', 'Subcat', 'Key', 'Value']].copy()
+    df_odd_img = sort_by_category(df_odd_raw)
+    df_odd_img = remove_duplicates(df_odd_img)
+    
+    # Gemini 정렬 및 중복 제거
+    df_gemini_raw = df_gemini_img[['Cat', 'Subcat', 'Key', 'Value']].copy()
+    df_gemini_clean = sort_by_category(df_gemini_raw)
+    df_gemini_clean = remove_duplicates(df_gemini_clean)
+    
+    # 누락된 항목 추가 (F&F 데이터에서 _cat_for_match, _subcat_for_match 확인)
+    # df_fnf_img에 _cat_for_match, _subcat_for_match가 없을 수 있으니 재생성
+    fnf_for_comparison = df_fnf_img.copy()
+    if '_cat_for_match' not in fnf_for_comparison.columns or '_subcat_for_match' not in fnf_for_comparison.columns:
+        fnf_for_comparison['_cat_for_match'] = fnf_for_comparison['Cat'].replace('', pd.NA).ffill().fillna('').str.lower()
+        fnf_for_comparison['_subcat_for_match'] = fnf_for_comparison['Subcat'].replace('', pd.NA).ffill().fillna('').str.lower()
+    
+    # 누락 항목 추가 (중복 제거는 이미 위에서 수행됨, 정답지 정규화는 한 번만)
+    fnf_index = build_normalized_index(fnf_for_comparison)
+    df_gemini_clean = add_missing_items(df_gemini_clean, fnf_for_comparison, fnf_index)
+    df_odd_img = add_missing_items(df_odd_img, fnf_for_comparison, fnf_index)
+    
+    return df_fnf_img, df_gemini_clean, df_odd_img
+
+
+# =============================================================================
+# 정답률 계산
+# =============================================================================
+
+def calculate_accuracy(vlm_df, fnf_df, fnf_lookup, fnf_catsubcat, fnf_index=None):
+    """VLM 결과의 정답률을 계산합니다. (F&F 정답지 기준)
+    
+    fnf_index: build_normalized_index(fnf_df) 결과 (없으면 새로 계산,
+        F&F Value 단어 집합을 'value_words'로 채워 다음 호출에서 재사용)
+    """
+    marketing_match = 0
+    marketing_total = 0
+    marketing_extra = 0
+    
+    product_match = 0
+    product_total = 0
+    product_extra = 0
+    subcat_errors = 0
+    
+    # 행 단위 값을 컬럼 배열로 한 번만 변환 (iterrows 대신 zip 순회)
+    vlm_cols = lower_columns(vlm_df, '_cat_for_match', '_subcat_for_match', 'Key', 'Value')
+    vlm_rows = list(zip(*vlm_cols))
+    
+    # Value가 있는 행 마스크 (빈 Value 행은 3단계 파이썬 루프에서 아예 제외)
+    vlm_has_value = vlm_cols[3] != ''
+    
+    # 브랜드/제품명 체크 (가산점) - 마스크로 한 번에 계산
+    has_brand = bool(((vlm_cols[2] == 'brand') & vlm_has_value).any())
+    has_product_name = bool(((vlm_cols[2] == 'product_name') & vlm_has_value).any())
+    
+    # 1단계: VLM에서 (Cat, Subcat, Key) → Value 매핑 생성
+    vlm_lookup = {}
+    vlm_rows_by_key = defaultdict(list)  # Key → [(cat, subcat), ...] (원본 행 순서, Subcat 검증용)
+    for v_cat, v_subcat, v_key, v_val in vlm_rows:
+        
+        # VLM 매핑 저장
+        vlm_lookup[(v_cat, v_subcat, v_key)] = v_val
+        vlm_lookup[(v_cat, v_key)] = v_val
+        vlm_rows_by_key[v_key].append((v_cat, v_subcat))
+    
+    # Cat 단어 매칭 폴백용 Key 역색인
+    vlm_by_key, vlm_marketing = index_lookup_by_key(vlm_lookup)
+    fnf_by_key, fnf_marketing = index_lookup_by_key(fnf_lookup)
+    
+    # 2단계: F&F 정답지를 순회하면서 VLM 결과와 비교 (F&F 기준)
+    if fnf_index is None:
+        fnf_index = build_normalized_index(fnf_df)
+    
+    # F&F Value 단어 집합 (행 순서대로 한 번만 계산, 같은 fnf_index로 여러 VLM을 채점할 때 재사용)
+    if 'value_words' not in fnf_index:
+        fnf_index['value_words'] = [
+            match_word_set(f_val, with_phrase=True, strip_plural=False)
+            for _, _, _, f_val in fnf_index['rows']
+        ]
+    
+    for (f_cat, f_subcat, f_key, f_val), f_val_words in zip(fnf_index['rows'], fnf_index['value_words']):
+        
+        # 마케팅 카테고리 (Key 없음)
+        is_marketing = not f_key
+        
+        # VLM 값 찾기 (Cat도 단어 단위로 매칭)
+        v_val = ''
+        # 먼저 정확한 조합으로 시도
+        v_val = vlm_lookup.get((f_cat, f_subcat, f_key), 
+                               vlm_lookup.get((f_cat, f_key), ''))
+        
+        # 없으면 단어 단위로 일치하는 Cat 찾기
+        if not v_val:
+            if not f_key:  # 마케팅 항목
+                # Cat만 단어 단위로 매칭 (Cat 단어 역색인에서 가장 먼저 나온 항목)
+                for v_cat, val in cat_word_candidates(vlm_marketing, f_cat):
+                    v_val = val
+                    break
+            else:  # 상품 항목
+                # Key 정확 일치 + Cat 단어 일치 후보만 비교: Subcat 퍼지 매칭
+                for v_cat, v_subcat, val in cat_word_candidates(vlm_by_key.get(f_key), f_cat):
+                    if not f_subcat or not v_subcat or fuzzy_match_subcat(f_subcat, v_subcat):
+                        v_val = val
+                        break
+        
+        if is_marketing and f_val:  # 마케팅
+            marketing_total += 1
+            if v_val:  # VLM이 해당 항목 분석함
+                # 단어 단위 매칭 체크 (word_level_match와 동일, F&F 쪽은 미리 계산한 집합 사용)
+                if not f_val_words.isdisjoint(match_word_set(v_val, with_phrase=True, strip_plural=False)):
+                    marketing_match += 1
+            # VLM이 누락하면 marketing_match 증가 안함 (자동 감점)
+        
+        elif not is_marketing and f_val:  # 상품
+            product_total += 1
+            
+            # Subcat 검증 (Cat도 단어 단위로 매칭)
+            if f_cat and f_subcat and f_key and v_val:
+                # VLM의 Subcat 찾기 (같은 Key인 VLM 행 중 Cat 단어가 처음 겹치는 행)
+                f_cat_words = match_word_set(f_cat, with_phrase=True, strip_plural=False)
+                for vlm_cat, vlm_subcat in vlm_rows_by_key.get(f_key, ()):
+                    if not f_cat_words.isdisjoint(match_word_set(vlm_cat, with_phrase=True, strip_plural=False)):
+                        if vlm_subcat and not fuzzy_match_subcat(vlm_subcat, f_subcat):
+                            subcat_errors += 1
+                        break
+            
+            # Value 검증
+            if v_val:  # VLM이 해당 항목 분석함
+                # 단어 단위 매칭 체크 (word_level_match와 동일, F&F 쪽은 미리 계산한 집합 사용)
+                if not f_val_words.isdisjoint(match_word_set(v_val, with_phrase=True, strip_plural=False)):
+                    product_match += 1
+            # VLM이 누락하면 product_match 증가 안함 (자동 감점)
+    
+    # 3단계: VLM에만 있는 항목 체크 (추가 분석)
+    for j in np.flatnonzero(vlm_has_value):
+        v_cat, v_subcat, v_key, v_val = vlm_rows[j]
+        
+        # 마케팅 카테고리
+        is_marketing = not v_key
+        
+        # F&F에 없는지 체크 (Cat도 단어 단위로 매칭)
+        f_val = fnf_lookup.get((v_cat, v_subcat, v_key), 
+                               fnf_lookup.get((v_cat, v_key), ''))
+        
+        # 없으면 단어 단위로 일치하는 Cat 찾기
+        if not f_val:
+            if not v_key:  # 마케팅 항목
+                for f_cat, val in cat_word_candidates(fnf_marketing, v_cat):
+                    f_val = val
+                    break
+            else:  # 상품 항목
+                for f_cat, f_subcat, val in cat_word_candidates(fnf_by_key.get(v_key), v_cat):
+                    if not v_subcat or not f_subcat or fuzzy_match_subcat(v_subcat, f_subcat):
+                        f_val = val
+                        break
+        
+        if not f_val:  # F&F에 없음
+            if is_marketing:
+                marketing_extra += 1
+            else:
+                product_extra += 1
+    
+    # 정답률 계산
+    marketing_acc = (marketing_match / marketing_total * 100) if marketing_total > 0 else 0
+    
+    # 상품 정답률 - 복합 계산 (Value 60% + Subcat 40%)
+    if product_total > 0:
+        value_acc = (product_match / product_total) * 100  # Value 정확도
+        subcat_acc = ((product_total - subcat_errors) / product_total) * 100  # Subcat 정확도
+        product_acc = (value_acc * 0.6) + (subcat_acc * 0.4)  # 가중 평균
+    else:
+        value_acc = 0
+        subcat_acc = 0
+        product_acc = 0
+    
+    return {
+        'marketing_acc': marketing_acc,
+        'marketing_match': marketing_match,
+        'marketing_total': marketing_total,
+        'marketing_extra': marketing_extra,
+        'product_acc': product_acc,
+        'value_acc': value_acc,  # 추가
+        'subcat_acc': subcat_acc,  # 추가
+        'product_match': product_match,
+        'product_total': product_total,
+        'product_extra': product_extra,
+        'subcat_errors': subcat_errors,
+        'has_brand': has_brand,
+        'has_product_name': has_product_name
+    }
+
+
+def index_lookup_by_key(lookup):
+    """(cat, subcat, key) / (cat, key) → value 매핑을 Key 기준 역색인으로 변환
+    
+    Cat 단어 매칭이 필요한 폴백 탐색에서 전체 매핑을 훑지 않고
+    같은 Key를 가진 항목만 비교하기 위해 사용 (dict 삽입 순서 유지).
+    
+    Returns:
+        tuple: (by_key, marketing)
+            by_key: {key: (entries, token_positions)} - (cat, subcat, key) 항목
+                entries: [(cat, subcat, value), ...]
+                token_positions: {Cat 단어: [entries 위치, ...]}
+            marketing: (entries, token_positions) - Key가 빈 (cat, '') 항목
+                entries: [(cat, value), ...]
+                token_positions: {Cat 단어: [entries 위치, ...]}
+    """
+    by_key = {}
+    marketing = ([], {})
+    for lookup_key, val in lookup.items():
+        if len(lookup_key) == 3:
+            cat, subcat, key = lookup_key
+            entries, token_positions = by_key.setdefault(key, ([], {}))
+            entry = (cat, subcat, val)
+        elif lookup_key[1] == '':
+            cat = lookup_key[0]
+            entries, token_positions = marketing
+            entry = (cat, val)
+        else:
+            continue
+        for token in match_word_set(cat, with_phrase=True, strip_plural=False):
+            token_positions.setdefault(token, []).append(len(entries))
+        entries.append(entry)
+    return by_key, marketing
+
+
+def index_lookup_by_catkey(lookup):
+    """(cat, subcat, key) → value 매핑을 (cat, key) 기준 색인으로 변환
+    
+    Subcat 표기만 다른 항목(하이픈/공백/언더스코어)을 찾을 때 전체 매핑을 훑지 않기 위해 사용.
+    
+    Returns:
+        dict: {(cat, key): [(정규화된 subcat, value), ...]} (dict 삽입 순서 유지)
+    """
+    by_catkey = defaultdict(list)
+    for lookup_key, val in lookup.items():
+        if len(lookup_key) == 3:
+            cat, subcat, key = lookup_key
+            by_catkey[(cat, key)].append((normalize_for_compare(subcat), val))
+    return dict(by_catkey)
+
+
+def cat_word_candidates(key_group, cat):
+    """index_lookup_by_key 항목 중 Cat 단어가 겹치는 것만 원래 순서대로 반환
+    
+    word_level_match(cat, 항목 cat)이 True인 항목과 동일합니다.
+    """
+    if not key_group:
+        return []
+    entries, token_positions = key_group
+    positions = set()
+    for token in match_word_set(cat, with_phrase=True, strip_plural=False):
+        positions.update(token_positions.get(token, ()))
+    return [entries[i] for i in sorted(positions)]
+
+
+# 단어 단위 매칭 함수
+def word_level_match(val1, val2):
+    """두 값이 단어 단위로 하나라도 겹치면 True (공백/하이픈 무시)
+    
+    단어 + 쉼표 구간 전체 문구(예: "sky blue" → "skyblue")를 비교하며,
+    단어 집합은 match_word_set 캐시를 사용하므로 같은 값은 한 번만 토큰화됩니다.
+    """
+    if not val1 or not val2:
+        return False
+    words1 = match_word_set(str(val1), with_phrase=True, strip_plural=False)
+    words2 = match_word_set(str(val2), with_phrase=True, strip_plural=False)
+    return not words1.isdisjoint(words2)
+
+
+# Subcat 퍼지 매칭 함수: 복수형 제거 + 부분 일치
+def fuzzy_match_subcat(subcat1, subcat2):
+    """Subcat이 유사한지 체크 (단어 단위 매칭, 복수형 허용)"""
+    if not subcat1 or not subcat2:
+        return False
+    return not match_word_set(str(subcat1)).isdisjoint(match_word_set(str(subcat2)))
+
+
+def build_fnf_lookup(fnf_df, fnf_index=None):
+    """F&F 정답지에서 (Cat, Subcat, Key) → Value 매핑 + Cat별 Subcat 조합 생성
+    
+    Args:
+        fnf_df: F&F 비교표
+        fnf_index: build_normalized_index(fnf_df) 결과 (없으면 새로 계산)
+    
+    Returns:
+        tuple: (fnf_lookup, fnf_catsubcat)
+    """
+    fnf_lookup = {}
+    fnf_catsubcat = defaultdict(set)  # Cat별 가능한 Subcat 저장 (정규화된 값)
+    
+    if fnf_index is None:
+        fnf_index = build_normalized_index(fnf_df)
+    for cat, subcat, key, val in fnf_index['rows']:
+        
+        # Value가 실제로 있는 경우만 저장 (빈 값은 건너뛰기)
+        if not val or val == 'nan':
+            continue
+        
+        # Value 매핑 (중복 키가 있으면 첫 번째 값만 유지)
+        key3 = (cat, subcat, key)
+        key2 = (cat, key)
+        
+        if key3 not in fnf_lookup:
+            fnf_lookup[key3] = val
+        if key2 not in fnf_lookup:
+            fnf_lookup[key2] = val
+        
+        # Cat별 Subcat 수집 (원본 값 저장, fuzzy_match_subcat에서 정규화 처리)
+        if cat and subcat:
+            fnf_catsubcat[cat].add(subcat)  # 원본 값 저장 (lower만 적용)
+    
+    # 조회 시 빈 set이 끼어들지 않도록 일반 dict로 반환
+    return fnf_lookup, dict(fnf_catsubcat)
+
+
+def highlight_vlm_row(row, match_rows, subcat_idx, value_idx, fnf_lookup, fnf_catsubcat, fnf_by_catkey):
+    """VLM 비교표 한 행의 하이라이트 스타일 (Gemini / 오드컨셉 공용)
+    
+    image_highlight_styles가 행마다 호출해 Styler.apply(axis=None)에 넘길 스타일 표를 만듭니다.
+    
+    Args:
+        row: 비교표 한 행
+        match_rows: 행 라벨 → 매칭용 값 (cat, subcat, key, value)
+        subcat_idx, value_idx: Subcat / Value 컬럼 위치
+        fnf_lookup, fnf_catsubcat: build_fnf_lookup 결과
+        fnf_by_catkey: index_lookup_by_catkey(fnf_lookup) 결과
+    
+    Returns:
+        list: 컬럼별 CSS 스타일
+    """
+    # 전체 컬럼 수에 맞춰 스타일 배열 생성
+    styles = [''] * len(row)
+    
+    # 누락된 항목인지 체크 (add_missing_items에서 bool 컬럼으로 통일됨)
+    if row.get('_is_missing', False):
+        if row.get('_is_key_only_missing', False):
+            # Cat-Subcat은 분석됐는데 Key만 누락: Value만 빨간색
+            styles[value_idx] = 'background-color: #f8d7da'
+            return styles
+        else:
+            # Cat-Subcat 자체가 누락: 전체 행 빨간색
+            return ['background-color: #f8d7da'] * len(row)
+    
+    # 매칭에는 ffill된 값 사용
+    v_cat, v_subcat, v_key, v_val = match_rows[row.name]
+    
+    # (cat, subcat) 조합이 F&F에 있는지 체크 (상품 카테고리만)
+    is_new_catsubcat = False
+    is_subcat_wrong = False  # 🆕 Subcat이 틀렸는지 추적
+    
+    if v_cat and v_subcat and v_key:  # 마케팅 제외
+        # F&F에 정확히 일치하는 Cat이 있는지 확인
+        if v_cat in fnf_catsubcat:
+            # F&F에 같은 Cat이 있으면 Subcat 검증 (단어 단위로 비교)
+            # VLM Subcat 단어 집합은 한 번만 구하고, 첫 번째로 겹치는 F&F Subcat에서 중단
+            v_subcat_words = match_word_set(v_subcat)
+            is_valid_subcat = any(
+                not v_subcat_words.isdisjoint(match_word_set(fnf_sub))
+                for fnf_sub in fnf_catsubcat[v_cat]
+            )
+            
+            if not is_valid_subcat:
+                # Subcat이 틀렸으면 Subcat 빨간색
+                styles[subcat_idx] = 'background-color: #f8d7da'
+                is_subcat_wrong = True  # 🆕 플래그 설정
+        else:
+            # F&F에 해당 Cat이 아예 없으면 신규 Cat-Subcat 조합
+            is_new_catsubcat = True
+    
+    # Value 검증
+    # F&F에서 같은 (Cat, Subcat, Key) 찾기 (Cat도 단어 단위로)
+    # 마케팅 항목(Key가 빈 문자열)의 경우 (cat, '') 조합으로도 조회
+    f_val = ''
+    if not v_key:  # 마케팅 카테고리
+        # 마케팅 카테고리는 정확히 일치해야 함 (word_level_match 사용 안함)
+        lookup_key = (v_cat, '')
+        if lookup_key in fnf_lookup:
+            f_val = fnf_lookup[lookup_key].lower()
+    else:  # 상품 카테고리
+        # 🆕 Subcat이 틀린 경우 (cat, key)만으로 조회
+        if is_subcat_wrong:
+            f_val = fnf_lookup.get((v_cat, v_key), '').lower()
+        else:
+            # 정확한 (Cat, Subcat, Key) 조합으로 조회
+            f_val = fnf_lookup.get((v_cat, v_subcat, v_key), '').lower()
+            
+            # 없으면 Subcat을 정규화해서 재시도 (하이픈, 공백, 언더스코어 무시)
+            # Cat과 Key는 정확히 일치: (cat, key) 색인의 후보만 비교
+            if not f_val:
+                v_subcat_normalized = normalize_for_compare(v_subcat)
+                for fnf_subcat_normalized, val in fnf_by_catkey.get((v_cat, v_key), ()):
+                    if v_subcat_normalized == fnf_subcat_normalized:
+                        f_val = val.lower()
+                        break
+    
+    if f_val:  # F&F에 값이 있을 때
+        # 🆕 VLM Value가 실제로 값이 있는지 명확히 체크 (공백, nan 등 제외)
+        v_val_str = str(v_val).strip().lower()
+        has_valid_value = v_val_str and v_val_str not in ['nan', 'none', 'null', 'n/a', '']
+        
+        # 단어 단위 매칭 체크
+        if has_valid_value and word_level_match(f_val, v_val):
+            pass  # 일치: 무색
+        elif has_valid_value:
+            styles[value_idx] = 'background-color: #f8d7da'  # 불일치: 빨간색
+        else:
+            # F&F에 값이 있는데 VLM이 누락 (빈 값)
+            styles[value_idx] = 'background-color: #f8d7da'  # 누락: 빨간색
+    else:
+        # F&F에 값이 없는 경우
+        # VLM Value가 실제로 값이 있는지 체크 (유효한 값인지)
+        v_val_str = str(v_val).strip().lower()
+        has_valid_value = v_val_str and v_val_str not in ['nan', 'none', 'null', 'n/a', '']
+        
+        if has_valid_value:  # F&F에 없는데 VLM이 추가 분석한 값
+            if is_new_catsubcat:
+                # 🆕 상품 카테고리에서 F&F에 없는 Cat → 오류 (빨간색)
+                return ['background-color: #f8d7da'] * len(row)
+            else:
+                # 기존 Cat-Subcat에서 Key만 추가된 경우 Value만 초록색
+                styles[value_idx] = 'background-color: #d4edda'
+    
+    return styles
+
+
+@st.cache_data(show_spinner=False)
+def image_fnf_lookup(image_name, img_col, data_version, _df_fnf, _df_gemini, _df_oddconcept):
+    """이미지 한 장의 F&F 매핑 (정답률 계산과 하이라이팅이 함께 사용)
+
+    Args:
+        image_name, img_col, data_version: prepare_image_tables와 동일 (캐시 키)
+        _df_fnf, _df_gemini, _df_oddconcept: 원본 DataFrame (캐시 키에서 제외)
+
+    Returns:
+        tuple: (fnf_lookup, fnf_catsubcat) - build_fnf_lookup 결과
+    """
+    df_fnf_img, _, _ = prepare_image_tables(
+        image_name, img_col, data_version, _df_fnf, _df_gemini, _df_oddconcept
+    )
+    return build_fnf_lookup(df_fnf_img)
+
+
+@st.cache_data(show_spinner=False)
+def image_accuracy(image_name, img_col, data_version, _df_fnf, _df_gemini, _df_oddconcept):
+    """이미지 한 장의 Gemini / 오드컨셉 정답률 (F&F 정답지 기준)
+
+    Args:
+        image_name, img_col, data_version: prepare_image_tables와 동일 (캐시 키)
+        _df_fnf, _df_gemini, _df_oddconcept: 원본 DataFrame (캐시 키에서 제외)
+
+    Returns:
+        tuple: (gemini_acc, odd_acc) - calculate_accuracy 결과 dict
+    """
+    df_fnf_img, df_gemini_clean, df_odd_img = prepare_image_tables(
+        image_name, img_col, data_version, _df_fnf, _df_gemini, _df_oddconcept
+    )
+    fnf_index = build_normalized_index(df_fnf_img)
+    fnf_lookup, fnf_catsubcat = image_fnf_lookup(
+        image_name, img_col, data_version, _df_fnf, _df_gemini, _df_oddconcept
+    )
+    gemini_acc = calculate_accuracy(df_gemini_clean, df_fnf_img, fnf_lookup, fnf_catsubcat, fnf_index)
+    odd_acc = calculate_accuracy(df_odd_img, df_fnf_img, fnf_lookup, fnf_catsubcat, fnf_index)
+    return gemini_acc, odd_acc
+
+
+
+@st.cache_data(show_spinner=False)
+def image_highlight_styles(image_name, img_col, data_version, vlm_name, _df_fnf, _df_gemini, _df_oddconcept):
+    """이미지 한 장의 VLM 비교표 하이라이트 스타일 (재실행 시 다시 계산하지 않음)
+
+    Args:
+        image_name, img_col, data_version: prepare_image_tables와 동일 (캐시 키)
+        vlm_name: 'gemini' 또는 'odd'
+        _df_fnf, _df_gemini, _df_oddconcept: 원본 DataFrame (캐시 키에서 제외)
+
+    Returns:
+        DataFrame: df_vlm과 같은 모양의 CSS 스타일 표 (Styler.apply(axis=None)용)
+    """
+    _, df_gemini_clean, df_odd_img = prepare_image_tables(
+        image_name, img_col, data_version, _df_fnf, _df_gemini, _df_oddconcept
+    )
+    df_vlm = df_gemini_clean if vlm_name == 'gemini' else df_odd_img
+    fnf_lookup, fnf_catsubcat = image_fnf_lookup(
+        image_name, img_col, data_version, _df_fnf, _df_gemini, _df_oddconcept
+    )
+    fnf_by_catkey = index_lookup_by_catkey(fnf_lookup)
+    
+    # 행 라벨 → 매칭용 값 (cat, subcat, key, value): 행마다 str/strip/lower 반복하지 않도록 컬럼 배열로 미리 계산
+    match_rows = dict(zip(df_vlm.index, zip(*lower_columns(df_vlm, '_cat_for_match', '_subcat_for_match', 'Key', 'Value'))))
+    
+    # 컬럼 인덱스 (모든 행이 같은 컬럼이므로 행마다 찾지 않고 한 번만)
+    display_cols = list(df_vlm.columns)
+    subcat_idx = display_cols.index('Subcat') if 'Subcat' in display_cols else 1
+    value_idx = display_cols.index('Value') if 'Value' in display_cols else 3
+    
+    return pd.DataFrame(
+        [highlight_vlm_row(row, match_rows, subcat_idx, value_idx, fnf_lookup, fnf_catsubcat, fnf_by_catkey)
+         for _, row in df_vlm.iterrows()],
+        index=df_vlm.index, columns=df_vlm.columns, dtype=object,
+    )
+
+# =============================================================================
+# 이미지 미리보기
+# =============================================================================
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def get_thumbnail_bytes(path_str, key, max_w=400) -> bytes:
+    """미리보기용 축소 이미지 (WEBP bytes)
+    
+    원본 해상도 그대로 브라우저로 보내지 않도록 한 번만 줄여서 캐시합니다.
+    JPEG는 thumbnail()이 draft 모드로 축소 디코딩하므로 원본 전체를 풀지 않습니다.
+    
+    Args:
+        path_str: 이미지 경로
+        key: file_key() 값 (파일이 바뀌면 다시 생성)
+        max_w: 최대 가로 크기 (px)
+    """
+    with Image.open(path_str) as img:
+        img.thumbnail((max_w, 65536), Image.LANCZOS)
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+        buf = BytesIO()
+        img.save(buf, format='WEBP', quality=85)
+    return buf.getvalue()
+
+
 # =============================================================================
 # 메인 앱
 # =============================================================================
@@ -300,10 +1452,8 @@ def main():
     st.title("VLM 비교 분석")
     st.caption("F&F 정답지 vs Gemini vs 오드컨셉")
     
-    # 데이터 로드 (파일 수정 시간을 전달하여 파일 변경 시 자동 갱신)
-    fnf_mtime = FNF_FILE.stat().st_mtime if FNF_FILE.exists() else None
-    oddconcept_mtime = ODDCONCEPT_FILE.stat().st_mtime if ODDCONCEPT_FILE.exists() else None
-    df_fnf, df_gemini, df_oddconcept, error = load_data(fnf_mtime, oddconcept_mtime)
+    # 데이터 로드 (파일 수정 시간 + 크기를 전달하여 파일 변경 시에만 다시 읽음)
+    df_fnf, df_gemini, df_oddconcept, error = load_data(file_key(FNF_FILE), file_key(ODDCONCEPT_FILE))
     
     if error:
         st.error(f"❌ 데이터 로드 실패: {error}")
@@ -312,16 +1462,7 @@ def main():
         st.info(f"- `{ODDCONCEPT_FILE.name}` (오드컨셉 결과)")
         return
     
-    # 통계 계산
-    stats = calculate_stats(df_fnf, df_gemini, df_oddconcept)
-    
-    st.divider()
-    
-    # ==========================================================================
-    # 전체 정답률 계산 (이미지별 정답률 평균)
-    # ==========================================================================
-    
-    # Gemini 결과에서 이미지 목록 추출
+    # Gemini 결과에서 이미지 목록 추출 (한 번만 계산하여 요약/상세 비교표에서 공유)
     if df_gemini is not None and len(df_gemini) > 0:
         img_col = 'Image_Name' if 'Image_Name' in df_gemini.columns else 'Image'
         if img_col in df_gemini.columns:
@@ -331,6 +1472,15 @@ def main():
     else:
         image_list = []
     
+    # 통계 계산
+    stats = calculate_stats(df_fnf, df_gemini, df_oddconcept)
+    
+    st.divider()
+    
+    # ==========================================================================
+    # 전체 정답률 계산 (이미지별 정답률 평균)
+    # ==========================================================================
+    
     # 총 비교 항목: F&F 정답지에서 중복 제외한 유니크 항목 수
     unique_items = df_fnf[['Cat', 'Subcat', 'Key', 'Value']].drop_duplicates()
     total_unique_items = len(unique_items)
@@ -366,35 +1516,36 @@ def main():
     
     st.divider()
     
-    # None 값 정리 함수 + 소문자 통일
-    def clean_none_values(df):
-        df_clean = df.copy()
-        for col in df_clean.columns:
-            df_clean[col] = df_clean[col].fillna('')
-            df_clean[col] = df_clean[col].astype(str).replace({
-                'None': '', 'none': '', 'nan': '', 'NaN': '', 
-                'N/A': '', 'n/a': '', 'null': '', 'NULL': '',
-                '/': ''  # 오드컨셉의 빈 Subcat 처리
-            })
-            # 모든 값 소문자로 통일
-            df_clean[col] = df_clean[col].str.lower()
-        return df_clean
+    # 비교표 캐시 키 (세 데이터가 그대로면 이미지별 전처리를 다시 하지 않음)
+    data_version = (frame_fingerprint(df_fnf), frame_fingerprint(df_gemini), frame_fingerprint(df_oddconcept))
     
-    # Gemini 결과에서 이미지 목록 추출
-    if df_gemini is not None and len(df_gemini) > 0:
-        img_col = 'Image_Name' if 'Image_Name' in df_gemini.columns else 'Image'
-        if img_col in df_gemini.columns:
-            image_list = df_gemini[img_col].dropna().unique().tolist()
-        else:
-            image_list = []
-    else:
-        image_list = []
+    # 전체 정답률 요약은 모든 이미지 기준 (표 렌더링 없이 정답률만 계산, 이미지별 캐시)
+    accuracy_by_image = {}
+    for image_name in image_list:
+        gemini_acc, odd_acc = image_accuracy(image_name, img_col, data_version, df_fnf, df_gemini, df_oddconcept)
+        accuracy_by_image[image_name] = (gemini_acc, odd_acc)
+        gemini_marketing_rates.append(gemini_acc['marketing_acc'])
+        gemini_product_rates.append(gemini_acc['product_acc'])
+        odd_marketing_rates.append(odd_acc['marketing_acc'])
+        odd_product_rates.append(odd_acc['product_acc'])
     
     if not image_list:
         st.warning("⚠️ Gemini 분석 결과가 없습니다. `python vlm_test.py` 실행 후 새로고침하세요.")
     else:
+        # 페이지 단위로 표시 (선택한 페이지의 이미지만 표/하이라이팅/미리보기 렌더링)
+        total_pages = (len(image_list) + IMAGES_PER_PAGE - 1) // IMAGES_PER_PAGE
+        page = 1
+        if total_pages > 1:
+            page = st.selectbox(
+                "페이지",
+                range(1, total_pages + 1),
+                format_func=lambda p: f"{p} / {total_pages} (이미지 {(p - 1) * IMAGES_PER_PAGE + 1}~{min(p * IMAGES_PER_PAGE, len(image_list))})"
+            )
+        page_start = (page - 1) * IMAGES_PER_PAGE
+        page_images = image_list[page_start:page_start + IMAGES_PER_PAGE]
+        
         # 이미지별로 섹션 생성
-        for img_idx, image_name in enumerate(image_list):
+        for img_idx, image_name in enumerate(page_images, start=page_start):
             st.markdown(f"이미지 {img_idx + 1}: `{image_name}`")
             
             # 이미지 미리보기 + 3개 테이블
@@ -402,148 +1553,20 @@ def main():
             
             with col_img:
                 image_path = IMAGES_DIR / image_name
-                if image_path.exists():
+                image_key = file_key(image_path)
+                if image_key is not None:
                     try:
-                        img = Image.open(image_path)
-                        st.image(img, use_container_width=True)
+                        st.image(get_thumbnail_bytes(str(image_path), image_key), use_container_width=True)
                     except:
                         st.text(f"📷 {image_name}")
                 else:
                     st.info(f"이미지 없음")
             
             with col_tables:
-                # 해당 이미지의 Gemini 데이터 필터링
-                df_gemini_img = df_gemini[df_gemini[img_col] == image_name].copy()
-                num_rows = len(df_gemini_img)
-                
-                # 이미지 이름 정규화하여 F&F, 오드컨셉 데이터 필터링
-                normalized_img_name = normalize_image_name(image_name)
-                
-                # F&F 데이터에서 이미지 이름으로 필터링
-                df_fnf['_norm_img'] = df_fnf['Image'].apply(normalize_image_name)
-                df_fnf_filtered = df_fnf[df_fnf['_norm_img'] == normalized_img_name].drop(columns=['_norm_img'])
-                
-                # 오드컨셉 데이터에서 이미지 이름으로 필터링
-                df_oddconcept['_norm_img'] = df_oddconcept['Image'].apply(normalize_image_name)
-                df_odd_filtered = df_oddconcept[df_oddconcept['_norm_img'] == normalized_img_name].drop(columns=['_norm_img'])
-                
-                # 카테고리 정렬 순서 정의 (마케팅 → Outer → Inner → Bottom → Shoes → 나머지)
-                cat_order = {
-                    # 마케팅 관련 (먼저)
-                    'age group': 1, 'color tone filter': 2, 'coordination method': 3,
-                    'gender': 4, 'skin tone': 5, 'pose': 6, 'hair style': 7,
-                    'expression': 8, 'gaze direction': 9, 'fashion style': 10,
-                    'location': 11, 'mood': 12,
-                    'number of people': 13, 'overall fashion color tone': 14,
-                    'season weather': 15, 'shooting composition': 16,
-                    # 상품 카테고리 순서
-                    'outer': 20, 'inner': 21, 'bottom': 22, 'shoes': 23,
-                    'bag': 24, 'accessories': 25, 'neckwear': 26, 'headwear': 27,
-                    'eyewear': 28, 'hosiery': 29, 'onepiece': 30, 'swimwear': 31
-                }
-                
-                def get_cat_order(cat_val):
-                    cat_lower = str(cat_val).strip().lower()
-                    return cat_order.get(cat_lower, 100)
-                
-                # 정렬 함수 (3개 테이블 모두 적용)
-                def sort_by_category(df_raw):
-                    df = df_raw.copy()
-                    df = clean_none_values(df)
-                    
-                    # 0. Cat과 Subcat에 쉼표가 있으면 첫 번째 값만 사용 (표시용)
-                    def get_first_value(text):
-                        if not text or pd.isna(text):
-                            return ''
-                        text_str = str(text).strip()
-                        if ',' in text_str:
-                            return text_str.split(',')[0].strip()
-                        return text_str
-                    
-                    df['Cat'] = df['Cat'].apply(get_first_value)
-                    df['Subcat'] = df['Subcat'].apply(get_first_value)
-                    
-                    # 1. 마케팅 카테고리 구분 (Key가 없으면 마케팅)
-                    df['_is_marketing'] = df['Key'].apply(lambda x: 1 if x == '' else 0)
-                    
-                    # 2. 정렬용으로 Cat/Subcat을 ffill (그룹 유지)
-                    df['_cat_filled'] = df['Cat'].replace('', pd.NA).ffill().fillna('')
-                    df['_subcat_filled'] = df['Subcat'].replace('', pd.NA).ffill().fillna('')
-                    
-                    # 마케팅 행은 _subcat_filled를 강제로 빈칸으로 (ffill 무시)
-                    df.loc[df['_is_marketing'] == 1, '_subcat_filled'] = ''
-                    
-                    # 3. 정렬 (마케팅은 먼저, 그 다음 의류)
-                    df['_cat_order'] = df['_cat_filled'].apply(lambda x: get_cat_order(x) if x else 999)
-                    df['_subcat_lower'] = df['_subcat_filled'].str.lower()
-                    df['_key_lower'] = df['Key'].str.lower()
-                    
-                    df = df.sort_values(['_cat_order', '_is_marketing', '_subcat_lower', '_key_lower'], ascending=[True, False, True, True]).reset_index(drop=True)
-                    
-                    # 3. 정렬 후, 같은 Cat/Subcat 그룹에서 첫 행만 값 유지하고 나머지는 빈칸으로
-                    prev_cat = None
-                    prev_subcat = None
-                    for idx in df.index:
-                        curr_cat = df.at[idx, '_cat_filled']
-                        curr_subcat = df.at[idx, '_subcat_filled']
-                        is_marketing = df.at[idx, '_is_marketing'] == 1
-                        
-                        if curr_cat == prev_cat and curr_subcat == prev_subcat:
-                            df.at[idx, 'Cat'] = ''
-                            df.at[idx, 'Subcat'] = ''
-                        else:
-                            df.at[idx, 'Cat'] = curr_cat
-                            # 마케팅 카테고리는 Subcat 무조건 빈칸
-                            df.at[idx, 'Subcat'] = '' if is_marketing else curr_subcat
-                            prev_cat = curr_cat
-                            prev_subcat = curr_subcat
-                    
-                    # 4. 하이라이트용 숨김 컬럼 추가 (ffill된 값)
-                    df['_cat_for_match'] = df['_cat_filled']
-                    df['_subcat_for_match'] = df['_subcat_filled']
-                    
-                    # 5. 임시 컬럼 제거 (매칭용은 남김, _is_missing과 _is_key_only_missing은 유지)
-                    return df.drop(columns=['_cat_order', '_subcat_lower', '_key_lower', '_cat_filled', '_subcat_filled', '_is_marketing'], errors='ignore')
-                
-                # === VLM 결과에서 중복 제거 함수 ===
-                def remove_duplicates(vlm_df):
-                    """같은 (Cat, Subcat, Key) 조합이 중복되면 첫 번째만 유지"""
-                    if len(vlm_df) == 0:
-                        return vlm_df
-                    
-                    # 정규화 함수
-                    def normalize_for_dedup(text):
-                        if not text or pd.isna(text):
-                            return ''
-                        return str(text).strip().lower().replace('-', '').replace(' ', '').replace('_', '')
-                    
-                    # 중복 체크를 위한 임시 컬럼 생성
-                    vlm_df_copy = vlm_df.copy()
-                    vlm_df_copy['_cat_norm'] = vlm_df_copy.get('_cat_for_match', vlm_df_copy.get('Cat', '')).apply(normalize_for_dedup)
-                    vlm_df_copy['_subcat_norm'] = vlm_df_copy.get('_subcat_for_match', vlm_df_copy.get('Subcat', '')).apply(normalize_for_dedup)
-                    vlm_df_copy['_key_norm'] = vlm_df_copy['Key'].apply(normalize_for_dedup)
-                    
-                    # (Cat, Subcat, Key) 조합으로 중복 제거 (첫 번째만 유지)
-                    vlm_df_dedup = vlm_df_copy.drop_duplicates(subset=['_cat_norm', '_subcat_norm', '_key_norm'], keep='first')
-                    
-                    # 임시 컬럼 제거
-                    vlm_df_dedup = vlm_df_dedup.drop(columns=['_cat_norm', '_subcat_norm', '_key_norm'])
-                    
-                    return vlm_df_dedup.reset_index(drop=True)
-                
-                # F&F 정답지 정렬 (이미지 이름으로 필터링된 데이터 사용)
-                df_fnf_raw = df_fnf_filtered[['Cat', 'Subcat', 'Key', 'Value']].copy()
-                df_fnf_img = sort_by_category(df_fnf_raw)
-                
-                # 오드컨셉 정렬 및 중복 제거
-                df_odd_raw = df_odd_filtered[['Cat', 'Subcat', 'Key', 'Value']].copy()
-                df_odd_img = sort_by_category(df_odd_raw)
-                df_odd_img = remove_duplicates(df_odd_img)
-                
-                # Gemini 정렬 및 중복 제거
-                df_gemini_raw = df_gemini_img[['Cat', 'Subcat', 'Key', 'Value']].copy()
-                df_gemini_clean = sort_by_category(df_gemini_raw)
-                df_gemini_clean = remove_duplicates(df_gemini_clean)
+                # 이미지별 비교표 전처리 (데이터가 바뀌지 않으면 캐시 사용)
+                df_fnf_img, df_gemini_clean, df_odd_img = prepare_image_tables(
+                    image_name, img_col, data_version, df_fnf, df_gemini, df_oddconcept
+                )
                 
                 # 3개 VLM 나란히 표시
                 t1, t2, t3 = st.columns(3)
@@ -564,639 +1587,24 @@ def main():
                             '_subcat_for_match': None  # 숨김
                         }
                     )
-                    
-                    # 정답지 사용 (엑셀에서 불러온 데이터)
-                    edited_fnf_img = df_fnf_img
                 
                 with t2:
                     st.markdown("**🟦 Gemini**")
                     
                     # Gemini 데이터 처리 (엑셀 파일 기반, 편집 불가)
                     
-                    # === F&F 정답지에 있는 항목 중 누락된 것 추가 ===
-                    def add_missing_items(vlm_df, fnf_df):
-                        """F&F에는 있지만 VLM에 없는 항목을 빈 값으로 추가"""
-                        # 정규화 함수 (하이픈, 공백, 언더스코어 제거)
-                        def normalize_for_compare(text):
-                            if not text:
-                                return ''
-                            return str(text).strip().lower().replace('-', '').replace(' ', '').replace('_', '')
-                        
-                        
-                        # Cat 단어 단위 매칭 함수
-                        def match_cat_words(cat1, cat2):
-                            """Cat이 단어 단위로 겹치는지 체크"""
-                            if not cat1 or not cat2:
-                                return False
-                            
-                            s1 = str(cat1).strip()
-                            s2 = str(cat2).strip()
-                            if not s1 or not s2:
-                                return False
-                            
-                            vals1 = [v.strip().lower() for v in str(cat1).split(',')]
-                            vals2 = [v.strip().lower() for v in str(cat2).split(',')]
-                            
-                            words1 = set()
-                            for v in vals1:
-                                for word in v.split():
-                                    normalized = normalize_for_compare(word).rstrip('s')
-                                    if normalized:
-                                        words1.add(normalized)
-                            
-                            words2 = set()
-                            for v in vals2:
-                                for word in v.split():
-                                    normalized = normalize_for_compare(word).rstrip('s')
-                                    if normalized:
-                                        words2.add(normalized)
-                            
-                            return bool(words1 & words2)
-                        
-                        # Subcat 단어 단위 매칭 함수 (fuzzy_match_subcat과 동일 로직)
-                        def match_subcat_words(subcat1, subcat2):
-                            """Subcat이 단어 단위로 겹치는지 체크 (t shirt와 t-shirt를 같은 것으로 인식)"""
-                            # 둘 다 값이 있어야 비교 가능
-                            if not subcat1 or not subcat2:
-                                return False
-                            
-                            # 공백이나 빈 문자열인 경우 False
-                            s1 = str(subcat1).strip()
-                            s2 = str(subcat2).strip()
-                            if not s1 or not s2:
-                                return False
-                            
-                            vals1 = [v.strip().lower() for v in str(subcat1).split(',')]
-                            vals2 = [v.strip().lower() for v in str(subcat2).split(',')]
-                            
-                            words1 = set()
-                            for v in vals1:
-                                # 전체 문구를 정규화한 버전도 추가 (t shirt -> tshirt, t-shirt -> tshirt)
-                                full_normalized = normalize_for_compare(v).rstrip('s')
-                                if full_normalized:
-                                    words1.add(full_normalized)
-                                # 단어별 정규화
-                                for word in v.split():
-                                    normalized = normalize_for_compare(word).rstrip('s')
-                                    if normalized:
-                                        words1.add(normalized)
-                            
-                            words2 = set()
-                            for v in vals2:
-                                # 전체 문구를 정규화한 버전도 추가
-                                full_normalized = normalize_for_compare(v).rstrip('s')
-                                if full_normalized:
-                                    words2.add(full_normalized)
-                                # 단어별 정규화
-                                for word in v.split():
-                                    normalized = normalize_for_compare(word).rstrip('s')
-                                    if normalized:
-                                        words2.add(normalized)
-                            
-                            return bool(words1 & words2)
-                        
-                        # VLM에 있는 항목들을 리스트로 저장 (원본 cat, subcat 포함)
-                        vlm_items_list = []
-                        
-                        for _, row in vlm_df.iterrows():
-                            cat_orig = str(row.get('_cat_for_match', row.get('Cat', ''))).strip().lower()
-                            cat = normalize_for_compare(cat_orig)
-                            subcat_orig = str(row.get('_subcat_for_match', row.get('Subcat', ''))).strip().lower()
-                            subcat = normalize_for_compare(subcat_orig)
-                            key = normalize_for_compare(row.get('Key', ''))
-                            if cat or key:  # 빈 항목 제외
-                                vlm_items_list.append({
-                                    'cat': cat,
-                                    'cat_orig': cat_orig,  # 단어 매칭용
-                                    'subcat': subcat,
-                                    'subcat_orig': subcat_orig,  # 단어 매칭용
-                                    'key': key
-                                })
-                        
-                        # F&F에는 있지만 VLM에 없는 항목 찾기
-                        missing_rows = []
-                        added_items = set()  # 이미 추가한 항목 추적 (중복 방지)
-                        
-                        for _, row in fnf_df.iterrows():
-                            cat_orig = str(row.get('_cat_for_match', '')).strip().lower()
-                            subcat_orig = str(row.get('_subcat_for_match', '')).strip().lower()
-                            key_orig = str(row.get('Key', '')).strip().lower()
-                            
-                            # 정규화된 값
-                            cat = normalize_for_compare(cat_orig)
-                            subcat = normalize_for_compare(subcat_orig)
-                            key = normalize_for_compare(key_orig)
-                            
-                            # 이미 추가한 항목이면 스킵
-                            if (cat, subcat, key) in added_items:
-                                continue
-                            
-                            # 마케팅 항목인지 확인 (Key가 없으면 마케팅)
-                            is_marketing = not key
-                            
-                            # VLM에서 같은 항목 찾기
-                            found_match = False
-                            is_key_only_missing = False
-                            matching_vlm_subcats = []
-                            has_same_cat = False
-                            
-                            if is_marketing:
-                                # 마케팅 항목: Cat만 단어 단위로 비교
-                                for vlm_item in vlm_items_list:
-                                    if match_cat_words(cat_orig, vlm_item['cat_orig']) and not vlm_item['key']:
-                                        # Cat이 단어 단위로 일치하고 둘 다 마케팅 항목(key 없음)
-                                        found_match = True
-                                        has_same_cat = True
-                                        break
-                                
-                                # ⚠️ 마케팅 항목에서 Cat 자체가 없으면 전체 행 빨간색
-                                if not has_same_cat:
-                                    is_key_only_missing = False
-                            else:
-                                # 상품 항목: Cat + Subcat + Key 비교 (Cat도 단어 단위)
-                                for vlm_item in vlm_items_list:
-                                    if match_cat_words(cat_orig, vlm_item['cat_orig']):
-                                        has_same_cat = True  # Cat은 단어 단위로 존재
-                                        # Cat이 같을 때, Subcat이 단어 단위로 일치하는지 체크
-                                        if match_subcat_words(subcat_orig, vlm_item['subcat_orig']):
-                                            matching_vlm_subcats.append(vlm_item)
-                                
-                                if matching_vlm_subcats:
-                                    # Subcat이 단어 단위로 일치하는 항목이 VLM에 존재
-                                    # 이제 Key가 있는지 체크
-                                    for vlm_item in matching_vlm_subcats:
-                                        if vlm_item['key'] == key:
-                                            # Key도 일치: 완전 일치
-                                            found_match = True
-                                            break
-                                    
-                                    # Key가 없으면 Key만 누락
-                                    if not found_match:
-                                        is_key_only_missing = True
-                                
-                                # ⚠️ Cat 자체가 VLM에 없으면 Key만 누락이 아님 (전체 Cat-Subcat 누락)
-                                if not has_same_cat:
-                                    is_key_only_missing = False
-                            
-                            # 누락된 항목인 경우에만 추가
-                            # 조건: cat이 있어야 하고, (마케팅은 key 없음 OR 상품은 key 있음)
-                            is_valid_item = cat and (is_marketing or key)  # cat 필수, 마케팅이거나 key 있어야 함
-                            
-                            if not found_match and is_valid_item:
-                                # 🆕 상품 항목: VLM이 같은 Cat을 이미 분석했다면 (다른 Subcat이라도)
-                                # Subcat이 다른 것은 누락으로 추가하지 않음 (하이라이팅에서 처리)
-                                if not is_marketing and has_same_cat and not matching_vlm_subcats and subcat:
-                                    # VLM이 Cat은 인식했지만 Subcat이 완전히 다름
-                                    # → 누락 추가 안 함 (VLM의 Subcat이 틀렸다고 빨간색 표시만)
-                                    continue
-                                
-                                # 누락된 항목 추가
-                                # Cat/Subcat이 빈값이면 _cat_for_match/_subcat_for_match 사용
-                                cat_display = row.get('Cat', '')
-                                subcat_display = row.get('Subcat', '')
-                                if not cat_display or str(cat_display).strip() == '':
-                                    cat_display = cat_orig
-                                if not subcat_display or str(subcat_display).strip() == '':
-                                    subcat_display = subcat_orig
-                                
-                                # ⚠️ Key만 누락인 경우, VLM에 이미 있는 Subcat을 사용
-                                if is_key_only_missing and matching_vlm_subcats:
-                                    # VLM의 Subcat을 사용 (단어 일치하는 첫 번째 항목)
-                                    vlm_subcat_orig = matching_vlm_subcats[0]['subcat_orig']
-                                    subcat_display = vlm_subcat_orig
-                                    subcat_for_match = vlm_subcat_orig
-                                else:
-                                    subcat_for_match = subcat_orig
-                                
-                                missing_rows.append({
-                                    'Cat': cat_display,
-                                    'Subcat': subcat_display,
-                                    'Key': row.get('Key', ''),
-                                    'Value': '',  # 빈 값
-                                    '_cat_for_match': cat_orig,
-                                    '_subcat_for_match': subcat_for_match,
-                                    '_is_missing': True,  # 누락 표시
-                                    '_is_key_only_missing': is_key_only_missing  # Key만 누락인지
-                                })
-                                added_items.add((cat, subcat, key))
-                        
-                        if missing_rows:
-                            vlm_df_updated = pd.concat([vlm_df, pd.DataFrame(missing_rows)], ignore_index=True)
-                            # 다시 정렬
-                            return sort_by_category(vlm_df_updated)
-                        return vlm_df
-                    
-                    # 누락된 항목 추가 (F&F 데이터에서 _cat_for_match, _subcat_for_match 확인)
-                    # edited_fnf_img에 _cat_for_match, _subcat_for_match가 없을 수 있으니 재생성
-                    fnf_for_comparison = edited_fnf_img.copy()
-                    if '_cat_for_match' not in fnf_for_comparison.columns or '_subcat_for_match' not in fnf_for_comparison.columns:
-                        fnf_for_comparison['_cat_for_match'] = fnf_for_comparison['Cat'].replace('', pd.NA).ffill().fillna('').str.lower()
-                        fnf_for_comparison['_subcat_for_match'] = fnf_for_comparison['Subcat'].replace('', pd.NA).ffill().fillna('').str.lower()
-                    
-                    # 누락 항목 추가 (중복 제거는 이미 위에서 수행됨)
-                    df_gemini_clean = add_missing_items(df_gemini_clean, fnf_for_comparison)
-                    
                     # 테이블 높이 계산 (누락 항목 포함)
                     table_height_gemini = min(600, 35 * len(df_gemini_clean) + 100)
                     
-                    # === 정답률 계산 함수 ===
-                    def calculate_accuracy(vlm_df, fnf_df, fnf_lookup, fnf_catsubcat, normalize_text, fuzzy_match_subcat, word_level_match):
-                        """VLM 결과의 정답률을 계산합니다. (F&F 정답지 기준)"""
-                        marketing_match = 0
-                        marketing_total = 0
-                        marketing_extra = 0
-                        
-                        product_match = 0
-                        product_total = 0
-                        product_extra = 0
-                        subcat_errors = 0
-                        
-                        # 가산점: 브랜드/제품명 인식
-                        has_brand = False
-                        has_product_name = False
-                        
-                        # 1단계: VLM에서 (Cat, Subcat, Key) → Value 매핑 생성
-                        vlm_lookup = {}
-                        for _, vlm_row in vlm_df.iterrows():
-                            v_cat = str(vlm_row.get('_cat_for_match', '')).strip().lower()
-                            v_subcat = str(vlm_row.get('_subcat_for_match', '')).strip().lower()
-                            v_key = str(vlm_row.get('Key', '')).strip().lower()
-                            v_val = str(vlm_row.get('Value', '')).strip().lower()
-                            
-                            # 브랜드/제품명 체크 (가산점)
-                            if v_key == 'brand' and v_val:
-                                has_brand = True
-                            if v_key == 'product_name' and v_val:
-                                has_product_name = True
-                            
-                            # VLM 매핑 저장
-                            vlm_lookup[(v_cat, v_subcat, v_key)] = v_val
-                            vlm_lookup[(v_cat, v_key)] = v_val
-                        
-                        # 2단계: F&F 정답지를 순회하면서 VLM 결과와 비교 (F&F 기준)
-                        for _, fnf_row in fnf_df.iterrows():
-                            f_cat = str(fnf_row.get('_cat_for_match', '')).strip().lower()
-                            f_subcat = str(fnf_row.get('_subcat_for_match', '')).strip().lower()
-                            f_key = str(fnf_row.get('Key', '')).strip().lower()
-                            f_val = str(fnf_row.get('Value', '')).strip().lower()
-                            
-                            # 마케팅 카테고리 (Key 없음)
-                            is_marketing = not f_key
-                            
-                            # VLM 값 찾기 (Cat도 단어 단위로 매칭)
-                            v_val = ''
-                            # 먼저 정확한 조합으로 시도
-                            v_val = vlm_lookup.get((f_cat, f_subcat, f_key), 
-                                                   vlm_lookup.get((f_cat, f_key), ''))
-                            
-                            # 없으면 단어 단위로 일치하는 Cat 찾기
-                            if not v_val:
-                                if not f_key:  # 마케팅 항목
-                                    # Cat만 단어 단위로 매칭
-                                    for key, val in vlm_lookup.items():
-                                        if len(key) == 2 and key[1] == '' and word_level_match(f_cat, key[0]):
-                                            v_val = val
-                                            break
-                                else:  # 상품 항목
-                                    for key, val in vlm_lookup.items():
-                                        if len(key) == 3:
-                                            v_cat, v_subcat, v_key = key
-                                            # Cat 단어 일치 + Key 정확 일치 + Subcat 퍼지 매칭
-                                            if word_level_match(f_cat, v_cat) and v_key == f_key:
-                                                if not f_subcat or not v_subcat or fuzzy_match_subcat(f_subcat, v_subcat):
-                                                    v_val = val
-                                                    break
-                            
-                            if is_marketing and f_val:  # 마케팅
-                                marketing_total += 1
-                                if v_val:  # VLM이 해당 항목 분석함
-                                    # 단어 단위 매칭 체크
-                                    if word_level_match(f_val, v_val):
-                                        marketing_match += 1
-                                # VLM이 누락하면 marketing_match 증가 안함 (자동 감점)
-                            
-                            elif not is_marketing and f_val:  # 상품
-                                product_total += 1
-                                
-                                # Subcat 검증 (Cat도 단어 단위로 매칭)
-                                if f_cat and f_subcat and f_key and v_val:
-                                    # VLM의 Subcat 찾기 (원본 데이터에서, Cat 단어 매칭)
-                                    vlm_matching_rows = []
-                                    for _, vlm_row in vlm_df.iterrows():
-                                        vlm_cat = str(vlm_row.get('_cat_for_match', '')).strip().lower()
-                                        vlm_key = str(vlm_row.get('Key', '')).strip().lower()
-                                        if word_level_match(f_cat, vlm_cat) and vlm_key == f_key:
-                                            vlm_matching_rows.append(vlm_row)
-                                            break
-                                    
-                                    if vlm_matching_rows:
-                                        v_subcat_check = str(vlm_matching_rows[0].get('_subcat_for_match', '')).strip().lower()
-                                        if v_subcat_check:
-                                            is_valid_subcat = fuzzy_match_subcat(v_subcat_check, f_subcat)
-                                            if not is_valid_subcat:
-                                                subcat_errors += 1
-                                
-                                # Value 검증
-                                if v_val:  # VLM이 해당 항목 분석함
-                                    # 단어 단위 매칭 체크
-                                    if word_level_match(f_val, v_val):
-                                        product_match += 1
-                                # VLM이 누락하면 product_match 증가 안함 (자동 감점)
-                        
-                        # 3단계: VLM에만 있는 항목 체크 (추가 분석)
-                        for _, vlm_row in vlm_df.iterrows():
-                            v_cat = str(vlm_row.get('_cat_for_match', '')).strip().lower()
-                            v_subcat = str(vlm_row.get('_subcat_for_match', '')).strip().lower()
-                            v_key = str(vlm_row.get('Key', '')).strip().lower()
-                            v_val = str(vlm_row.get('Value', '')).strip().lower()
-                            
-                            if not v_val:
-                                continue
-                            
-                            # 마케팅 카테고리
-                            is_marketing = not v_key
-                            
-                            # F&F에 없는지 체크 (Cat도 단어 단위로 매칭)
-                            f_val = fnf_lookup.get((v_cat, v_subcat, v_key), 
-                                                   fnf_lookup.get((v_cat, v_key), ''))
-                            
-                            # 없으면 단어 단위로 일치하는 Cat 찾기
-                            if not f_val:
-                                if not v_key:  # 마케팅 항목
-                                    for key, val in fnf_lookup.items():
-                                        if len(key) == 2 and key[1] == '' and word_level_match(v_cat, key[0]):
-                                            f_val = val
-                                            break
-                                else:  # 상품 항목
-                                    for key, val in fnf_lookup.items():
-                                        if len(key) == 3:
-                                            f_cat, f_subcat, f_key = key
-                                            if word_level_match(v_cat, f_cat) and v_key == f_key:
-                                                if not v_subcat or not f_subcat or fuzzy_match_subcat(v_subcat, f_subcat):
-                                                    f_val = val
-                                                    break
-                            
-                            if not f_val:  # F&F에 없음
-                                if is_marketing:
-                                    marketing_extra += 1
-                                else:
-                                    product_extra += 1
-                        
-                        # 정답률 계산
-                        marketing_acc = (marketing_match / marketing_total * 100) if marketing_total > 0 else 0
-                        
-                        # 상품 정답률 - 복합 계산 (Value 60% + Subcat 40%)
-                        if product_total > 0:
-                            value_acc = (product_match / product_total) * 100  # Value 정확도
-                            subcat_acc = ((product_total - subcat_errors) / product_total) * 100  # Subcat 정확도
-                            product_acc = (value_acc * 0.6) + (subcat_acc * 0.4)  # 가중 평균
-                        else:
-                            value_acc = 0
-                            subcat_acc = 0
-                            product_acc = 0
-                        
-                        return {
-                            'marketing_acc': marketing_acc,
-                            'marketing_match': marketing_match,
-                            'marketing_total': marketing_total,
-                            'marketing_extra': marketing_extra,
-                            'product_acc': product_acc,
-                            'value_acc': value_acc,  # 추가
-                            'subcat_acc': subcat_acc,  # 추가
-                            'product_match': product_match,
-                            'product_total': product_total,
-                            'product_extra': product_extra,
-                            'subcat_errors': subcat_errors,
-                            'has_brand': has_brand,
-                            'has_product_name': has_product_name
-                        }
-                    
-                    # 정규화 함수: 하이픈, 공백, 언더스코어 제거
-                    def normalize_text(text):
-                        if not text:
-                            return ''
-                        return str(text).strip().lower().replace('-', '').replace(' ', '').replace('_', '')
-                    
-                    # 단어 단위 매칭 함수
-                    def word_level_match(val1, val2):
-                        """두 값이 단어 단위로 하나라도 겹치면 True (공백/하이픈 무시)"""
-                        if not val1 or not val2:
-                            return False
-                        
-                        def normalize_word(word):
-                            """단어 정규화: 소문자 + 공백/하이픈/언더스코어 제거"""
-                            return word.strip().lower().replace(' ', '').replace('-', '').replace('_', '')
-                        
-                        # 쉼표로 split (여러 값 처리)
-                        vals1 = [v.strip().lower() for v in str(val1).split(',')]
-                        vals2 = [v.strip().lower() for v in str(val2).split(',')]
-                        
-                        # 각 값에서 단어 추출 및 정규화
-                        words1 = set()
-                        for v in vals1:
-                            # 공백으로 구분된 단어들
-                            for word in v.split():
-                                normalized = normalize_word(word)
-                                if normalized:
-                                    words1.add(normalized)
-                            # 전체 문구도 정규화하여 추가 (예: "sky blue" → "skyblue")
-                            full_normalized = normalize_word(v)
-                            if full_normalized:
-                                words1.add(full_normalized)
-                        
-                        words2 = set()
-                        for v in vals2:
-                            for word in v.split():
-                                normalized = normalize_word(word)
-                                if normalized:
-                                    words2.add(normalized)
-                            full_normalized = normalize_word(v)
-                            if full_normalized:
-                                words2.add(full_normalized)
-                        
-                        # 단어가 하나라도 겹치면 True
-                        return len(words1 & words2) > 0
-                    
-                    
-                    # Subcat 퍼지 매칭 함수: 복수형 제거 + 부분 일치
-                    def fuzzy_match_subcat(subcat1, subcat2):
-                        """Subcat이 유사한지 체크 (단어 단위 매칭, 복수형 허용)"""
-                        if not subcat1 or not subcat2:
-                            return False
-                        
-                        # 쉼표로 split (여러 값 처리: "running shoes, sneakers")
-                        vals1 = [v.strip().lower() for v in str(subcat1).split(',')]
-                        vals2 = [v.strip().lower() for v in str(subcat2).split(',')]
-                        
-                        # 각 값에서 단어 추출 (정규화 + 복수형 제거)
-                        words1 = set()
-                        for v in vals1:
-                            # 단어별로 정규화 + 복수형 제거
-                            for word in v.split():
-                                normalized = normalize_text(word).rstrip('s')
-                                if normalized:  # 빈 문자열 제외
-                                    words1.add(normalized)
-                        
-                        words2 = set()
-                        for v in vals2:
-                            for word in v.split():
-                                normalized = normalize_text(word).rstrip('s')
-                                if normalized:
-                                    words2.add(normalized)
-                        
-                        # 단어가 하나라도 겹치면 True
-                        return bool(words1 & words2)
-                    
-                    # F&F에서 (Cat, Subcat, Key) → Value 매핑 + Cat/Subcat 조합 저장
-                    # 편집된 데이터(edited_fnf_img)를 사용하여 매핑 생성
-                    fnf_lookup = {}
-                    fnf_catsubcat = {}  # Cat별 가능한 Subcat 저장 (정규화된 값)
-                    
-                    for _, r in edited_fnf_img.iterrows():
-                        cat = str(r.get('_cat_for_match', r.get('Cat', ''))).strip().lower()
-                        subcat = str(r.get('_subcat_for_match', r.get('Subcat', ''))).strip().lower()
-                        key = str(r.get('Key', '')).strip().lower()
-                        val = str(r.get('Value', '')).strip().lower()
-                        
-                        # Value가 실제로 있는 경우만 저장 (빈 값은 건너뛰기)
-                        if not val or val == 'nan':
-                            continue
-                        
-                        # Value 매핑 (중복 키가 있으면 첫 번째 값만 유지)
-                        key3 = (cat, subcat, key)
-                        key2 = (cat, key)
-                        
-                        if key3 not in fnf_lookup:
-                            fnf_lookup[key3] = val
-                        if key2 not in fnf_lookup:
-                            fnf_lookup[key2] = val
-                        
-                        # Cat별 Subcat 수집 (원본 값 저장, fuzzy_match_subcat에서 정규화 처리)
-                        if cat and subcat:
-                            if cat not in fnf_catsubcat:
-                                fnf_catsubcat[cat] = set()
-                            fnf_catsubcat[cat].add(subcat)  # 원본 값 저장 (lower만 적용)
-                    
-                    def highlight_gemini(row):
-                        # 전체 컬럼 수에 맞춰 스타일 배열 생성
-                        styles = [''] * len(row)
-                        
-                        # 누락된 항목인지 체크 (문자열로 변환되었을 수 있으므로 명시적 비교)
-                        is_missing = row.get('_is_missing', False)
-                        is_key_only_missing = row.get('_is_key_only_missing', False)
-                        
-                        # boolean이든 문자열이든 True/true로 처리
-                        if isinstance(is_missing, str):
-                            is_missing = is_missing.lower() == 'true'
-                        if isinstance(is_key_only_missing, str):
-                            is_key_only_missing = is_key_only_missing.lower() == 'true'
-                        
-                        if is_missing:
-                            if is_key_only_missing:
-                                # Cat-Subcat은 분석됐는데 Key만 누락: Value만 빨간색
-                                value_idx = list(row.index).index('Value') if 'Value' in row.index else 3
-                                styles[value_idx] = 'background-color: #f8d7da'
-                                return styles
-                            else:
-                                # Cat-Subcat 자체가 누락: 전체 행 빨간색
-                                return ['background-color: #f8d7da'] * len(row)
-                        
-                        # 매칭에는 ffill된 값 사용
-                        g_cat = str(row.get('_cat_for_match', '')).strip().lower()
-                        g_subcat = str(row.get('_subcat_for_match', '')).strip().lower()
-                        g_key = str(row.get('Key', '')).strip().lower()
-                        g_val = str(row.get('Value', '')).strip().lower()
-                        
-                        # 컬럼 인덱스 찾기
-                        subcat_idx = list(row.index).index('Subcat') if 'Subcat' in row.index else 1
-                        value_idx = list(row.index).index('Value') if 'Value' in row.index else 3
-                        
-                        # (cat, subcat) 조합이 F&F에 있는지 체크 (상품 카테고리만)
-                        is_new_catsubcat = False
-                        is_subcat_wrong = False  # 🆕 Subcat이 틀렸는지 추적
-                        
-                        if g_cat and g_subcat and g_key:  # 마케팅 제외
-                            # F&F에 정확히 일치하는 Cat이 있는지 확인
-                            if g_cat in fnf_catsubcat:
-                                # F&F에 같은 Cat이 있으면 Subcat 검증 (단어 단위로 비교)
-                                is_valid_subcat = any(
-                                    fuzzy_match_subcat(g_subcat, fnf_sub)
-                                    for fnf_sub in fnf_catsubcat[g_cat]
-                                )
-                                
-                                if not is_valid_subcat:
-                                    # Subcat이 틀렸으면 Subcat 빨간색
-                                    styles[subcat_idx] = 'background-color: #f8d7da'
-                                    is_subcat_wrong = True  # 🆕 플래그 설정
-                            else:
-                                # F&F에 해당 Cat이 아예 없으면 신규 Cat-Subcat 조합
-                                is_new_catsubcat = True
-                        
-                        # Value 검증
-                        # F&F에서 같은 (Cat, Subcat, Key) 찾기 (Cat도 단어 단위로)
-                        # 마케팅 항목(Key가 빈 문자열)의 경우 (cat, '') 조합으로도 조회
-                        f_val = ''
-                        if not g_key:  # 마케팅 카테고리
-                            # 마케팅 카테고리는 정확히 일치해야 함 (word_level_match 사용 안함)
-                            lookup_key = (g_cat, '')
-                            if lookup_key in fnf_lookup:
-                                f_val = fnf_lookup[lookup_key].lower()
-                        else:  # 상품 카테고리
-                            # 🆕 Subcat이 틀린 경우 (cat, key)만으로 조회
-                            if is_subcat_wrong:
-                                f_val = fnf_lookup.get((g_cat, g_key), '').lower()
-                            else:
-                                # 정확한 (Cat, Subcat, Key) 조합으로 조회
-                                f_val = fnf_lookup.get((g_cat, g_subcat, g_key), '').lower()
-                                
-                                # 없으면 Subcat을 정규화해서 재시도 (하이픈, 공백, 언더스코어 무시)
-                                if not f_val:
-                                    g_subcat_normalized = normalize_text(g_subcat)
-                                    for fnf_cat_key in fnf_lookup.keys():
-                                        if len(fnf_cat_key) == 3:  # (cat, subcat, key) 조합
-                                            fnf_cat, fnf_subcat, fnf_key = fnf_cat_key
-                                            # Cat과 Key는 정확히 일치, Subcat은 정규화해서 비교
-                                            if (g_cat == fnf_cat and g_key == fnf_key and 
-                                                g_subcat_normalized == normalize_text(fnf_subcat)):
-                                                f_val = fnf_lookup[fnf_cat_key].lower()
-                                                break
-                        
-                        if f_val:  # F&F에 값이 있을 때
-                            # 🆕 VLM Value가 실제로 값이 있는지 명확히 체크 (공백, nan 등 제외)
-                            g_val_str = str(g_val).strip().lower()
-                            has_valid_value = g_val_str and g_val_str not in ['nan', 'none', 'null', 'n/a', '']
-                            
-                            # 단어 단위 매칭 체크
-                            if has_valid_value and word_level_match(f_val, g_val):
-                                pass  # 일치: 무색
-                            elif has_valid_value:
-                                styles[value_idx] = 'background-color: #f8d7da'  # 불일치: 빨간색
-                            else:
-                                # F&F에 값이 있는데 VLM이 누락 (빈 값)
-                                styles[value_idx] = 'background-color: #f8d7da'  # 누락: 빨간색
-                        else:
-                            # F&F에 값이 없는 경우
-                            # VLM Value가 실제로 값이 있는지 체크 (유효한 값인지)
-                            g_val_str = str(g_val).strip().lower()
-                            has_valid_value = g_val_str and g_val_str not in ['nan', 'none', 'null', 'n/a', '']
-                            
-                            if has_valid_value:  # F&F에 없는데 Gemini가 추가 분석한 값
-                                if is_new_catsubcat:
-                                    # 🆕 상품 카테고리에서 F&F에 없는 Cat → 오류 (빨간색)
-                                    return ['background-color: #f8d7da'] * len(row)
-                                else:
-                                    # 기존 Cat-Subcat에서 Key만 추가된 경우 Value만 초록색
-                                    styles[value_idx] = 'background-color: #d4edda'
-                        
-                        return styles
-                    
-                    # 원본 데이터 사용 (읽기 전용)
-                    df_gemini_display = df_gemini_clean.copy()
+                    # 하이라이트 스타일 (이미지별 캐시, 위젯 조작으로 재실행돼도 다시 계산하지 않음)
+                    gemini_styles = image_highlight_styles(
+                        image_name, img_col, data_version, 'gemini', df_fnf, df_gemini, df_oddconcept
+                    )
                     
-                    # 하이라이팅 테이블 표시
-                    table_height_gemini = min(600, 35 * len(df_gemini_display) + 100)
+                    # 하이라이팅 테이블 표시 (Styler는 읽기 전용이므로 복사 없이 원본 사용)
+                    table_height_gemini = min(600, 35 * len(df_gemini_clean) + 100)
                     st.dataframe(
-                        df_gemini_display.style.apply(highlight_gemini, axis=1),
+                        df_gemini_clean.style.apply(lambda _: gemini_styles, axis=None),
                         use_container_width=True, height=table_height_gemini, hide_index=True,
                         column_config={
                             '_cat_for_match': None,  # 숨김
@@ -1206,12 +1614,8 @@ def main():
                         }
                     )
                     
-                    # Gemini 정답률 계산 및 표시 (맨 하단) - 편집된 데이터 사용
-                    gemini_acc = calculate_accuracy(df_gemini_display, edited_fnf_img, fnf_lookup, fnf_catsubcat, normalize_text, fuzzy_match_subcat, word_level_match)
-                    
-                    # 전체 정답률 계산을 위해 리스트에 추가
-                    gemini_marketing_rates.append(gemini_acc['marketing_acc'])
-                    gemini_product_rates.append(gemini_acc['product_acc'])
+                    # Gemini 정답률 표시 (맨 하단) - 전체 요약에서 미리 계산한 값 사용
+                    gemini_acc, _ = accuracy_by_image[image_name]
                     
                     # 가산점 텍스트 생성
                     bonus_text = ""
@@ -1234,131 +1638,18 @@ def main():
                     
                     # 오드컨셉 데이터 처리 (엑셀 파일 기반, 편집 불가)
                     
-                    # 누락 항목 추가 (중복 제거는 이미 위에서 수행됨)
-                    df_odd_img = add_missing_items(df_odd_img, fnf_for_comparison)
-                    
                     # 테이블 높이 계산 (누락 항목 포함)
                     table_height_odd = min(600, 35 * len(df_odd_img) + 100)
                     
-                    def highlight_odd(row):
-                        # 전체 컬럼 수에 맞춰 스타일 배열 생성
-                        styles = [''] * len(row)
-                        
-                        # 누락된 항목인지 체크 (문자열로 변환되었을 수 있으므로 명시적 비교)
-                        is_missing = row.get('_is_missing', False)
-                        is_key_only_missing = row.get('_is_key_only_missing', False)
-                        
-                        # boolean이든 문자열이든 True/true로 처리
-                        if isinstance(is_missing, str):
-                            is_missing = is_missing.lower() == 'true'
-                        if isinstance(is_key_only_missing, str):
-                            is_key_only_missing = is_key_only_missing.lower() == 'true'
-                        
-                        if is_missing:
-                            if is_key_only_missing:
-                                # Cat-Subcat은 분석됐는데 Key만 누락: Value만 빨간색
-                                value_idx = list(row.index).index('Value') if 'Value' in row.index else 3
-                                styles[value_idx] = 'background-color: #f8d7da'
-                                return styles
-                            else:
-                                # Cat-Subcat 자체가 누락: 전체 행 빨간색
-                                return ['background-color: #f8d7da'] * len(row)
-                        
-                        # 매칭에는 ffill된 값 사용
-                        o_cat = str(row.get('_cat_for_match', '')).strip().lower()
-                        o_subcat = str(row.get('_subcat_for_match', '')).strip().lower()
-                        o_key = str(row.get('Key', '')).strip().lower()
-                        o_val = str(row.get('Value', '')).strip().lower()
-                        
-                        # 컬럼 인덱스 찾기
-                        subcat_idx = list(row.index).index('Subcat') if 'Subcat' in row.index else 1
-                        value_idx = list(row.index).index('Value') if 'Value' in row.index else 3
-                        
-                        # (cat, subcat) 조합이 F&F에 있는지 체크 (상품 카테고리만)
-                        is_new_catsubcat = False
-                        is_subcat_wrong = False  # 🆕 Subcat이 틀렸는지 추적
-                        
-                        if o_cat and o_subcat and o_key:  # 마케팅 제외
-                            # F&F에 정확히 일치하는 Cat이 있는지 확인
-                            if o_cat in fnf_catsubcat:
-                                # F&F에 같은 Cat이 있으면 Subcat 검증 (단어 단위로 비교)
-                                is_valid_subcat = any(
-                                    fuzzy_match_subcat(o_subcat, fnf_sub)
-                                    for fnf_sub in fnf_catsubcat[o_cat]
-                                )
-                                
-                                if not is_valid_subcat:
-                                    # Subcat이 틀렸으면 Subcat 빨간색
-                                    styles[subcat_idx] = 'background-color: #f8d7da'
-                                    is_subcat_wrong = True  # 🆕 플래그 설정
-                            else:
-                                # F&F에 해당 Cat이 아예 없으면 신규 Cat-Subcat 조합
-                                is_new_catsubcat = True
-                        
-                        # Value 검증
-                        # F&F에서 같은 (Cat, Subcat, Key) 찾기 (Cat도 단어 단위로)
-                        # 마케팅 항목(Key가 빈 문자열)의 경우 (cat, '') 조합으로도 조회
-                        f_val = ''
-                        if not o_key:  # 마케팅 카테고리
-                            # 마케팅 카테고리는 정확히 일치해야 함 (word_level_match 사용 안함)
-                            lookup_key = (o_cat, '')
-                            if lookup_key in fnf_lookup:
-                                f_val = fnf_lookup[lookup_key].lower()
-                        else:  # 상품 카테고리
-                            # 🆕 Subcat이 틀린 경우 (cat, key)만으로 조회
-                            if is_subcat_wrong:
-                                f_val = fnf_lookup.get((o_cat, o_key), '').lower()
-                            else:
-                                # 정확한 (Cat, Subcat, Key) 조합으로 조회
-                                f_val = fnf_lookup.get((o_cat, o_subcat, o_key), '').lower()
-                                
-                                # 없으면 Subcat을 정규화해서 재시도 (하이픈, 공백, 언더스코어 무시)
-                                if not f_val:
-                                    o_subcat_normalized = normalize_text(o_subcat)
-                                    for fnf_cat_key in fnf_lookup.keys():
-                                        if len(fnf_cat_key) == 3:  # (cat, subcat, key) 조합
-                                            fnf_cat, fnf_subcat, fnf_key = fnf_cat_key
-                                            # Cat과 Key는 정확히 일치, Subcat은 정규화해서 비교
-                                            if (o_cat == fnf_cat and o_key == fnf_key and 
-                                                o_subcat_normalized == normalize_text(fnf_subcat)):
-                                                f_val = fnf_lookup[fnf_cat_key].lower()
-                                                break
-                        
-                        if f_val:  # F&F에 값이 있을 때
-                            # 🆕 VLM Value가 실제로 값이 있는지 명확히 체크 (공백, nan 등 제외)
-                            o_val_str = str(o_val).strip().lower()
-                            has_valid_value = o_val_str and o_val_str not in ['nan', 'none', 'null', 'n/a', '']
-                            
-                            # 단어 단위 매칭 체크
-                            if has_valid_value and word_level_match(f_val, o_val):
-                                pass  # 일치: 무색
-                            elif has_valid_value:
-                                styles[value_idx] = 'background-color: #f8d7da'  # 불일치: 빨간색
-                            else:
-                                # F&F에 값이 있는데 VLM이 누락 (빈 값)
-                                styles[value_idx] = 'background-color: #f8d7da'  # 누락: 빨간색
-                        else:
-                            # F&F에 값이 없는 경우
-                            # VLM Value가 실제로 값이 있는지 체크 (유효한 값인지)
-                            o_val_str = str(o_val).strip().lower()
-                            has_valid_value = o_val_str and o_val_str not in ['nan', 'none', 'null', 'n/a', '']
-                            
-                            if has_valid_value:  # F&F에 없는데 오드컨셉이 추가 분석한 값
-                                if is_new_catsubcat:
-                                    # 🆕 상품 카테고리에서 F&F에 없는 Cat → 오류 (빨간색)
-                                    return ['background-color: #f8d7da'] * len(row)
-                                else:
-                                    # 기존 Cat-Subcat에서 Key만 추가된 경우 Value만 초록색
-                                    styles[value_idx] = 'background-color: #d4edda'
-                        return styles
-                    
-                    # 원본 데이터 사용 (읽기 전용)
-                    df_odd_display = df_odd_img.copy()
+                    # 하이라이트 스타일 (이미지별 캐시, 위젯 조작으로 재실행돼도 다시 계산하지 않음)
+                    odd_styles = image_highlight_styles(
+                        image_name, img_col, data_version, 'odd', df_fnf, df_gemini, df_oddconcept
+                    )
                     
-                    # 하이라이팅 테이블 표시
-                    table_height_odd = min(600, 35 * len(df_odd_display) + 100)
+                    # 하이라이팅 테이블 표시 (Styler는 읽기 전용이므로 복사 없이 원본 사용)
+                    table_height_odd = min(600, 35 * len(df_odd_img) + 100)
                     st.dataframe(
-                        df_odd_display.style.apply(highlight_odd, axis=1),
+                        df_odd_img.style.apply(lambda _: odd_styles, axis=None),
                         use_container_width=True, height=table_height_odd, hide_index=True,
                         column_config={
                             '_cat_for_match': None,  # 숨김
@@ -1368,12 +1659,8 @@ def main():
                         }
                     )
                     
-                    # 오드컨셉 정답률 계산 및 표시 (맨 하단) - 편집된 데이터 사용
-                    odd_acc = calculate_accuracy(df_odd_display, edited_fnf_img, fnf_lookup, fnf_catsubcat, normalize_text, fuzzy_match_subcat, word_level_match)
-                    
-                    # 전체 정답률 계산을 위해 리스트에 추가
-                    odd_marketing_rates.append(odd_acc['marketing_acc'])
-                    odd_product_rates.append(odd_acc['product_acc'])
+                    # 오드컨셉 정답률 표시 (맨 하단) - 전체 요약에서 미리 계산한 값 사용
+                    _, odd_acc = accuracy_by_image[image_name]
                     
                     # 가산점 텍스트 생성
                     odd_bonus_text = ""
@@ -1,54 +1,178 @@
 """
 실패한 이미지만 재분석하는 스크립트
 """
-import pandas as pd
+import os
+import time
+import random
 from pathlib import Path
-from vlm_test import analyze_single_image, load_all_references
+from openpyxl import Workbook, load_workbook
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from vlm_test import (
+    RESULT_COLUMNS, analyze_image, create_analysis_prompt, flatten_to_vertical, get_client,
+    is_retryable_error, load_all_references, parse_gemini_response
+)
 
-# 최신 결과 파일 찾기
+# 동시 재분석 스레드 수 (Gemini 호출은 대부분 네트워크 대기)
+RETRY_WORKERS = 8
+
+# 이미지별 최대 시도 횟수와 재시도 대기 시간 범위(초)
+MAX_ATTEMPTS = 5
+BACKOFF_MIN = 1
+BACKOFF_MAX = 32
+
+# 재분석 이미지 상세도 (analyze_single_image와 같은 설정)
+RETRY_DETAIL = "high"
+
+
+def analyze_with_backoff(img_name: str, client, prompt: str) -> dict:
+    """일시적 오류면 지수 백오프 + 지터로 재시도하며 이미지를 분석합니다.
+    
+    429/5xx, 연결 끊김, JSON 파싱 실패는 1, 2, 4, ... 초(최대 BACKOFF_MAX)를 상한으로
+    무작위 대기 후 다시 호출합니다. 400이나 인증 오류처럼 다시 보내도 같은 오류는 바로,
+    MAX_ATTEMPTS번 모두 실패하면 마지막 에러로 예외를 냅니다.
+    
+    여러 스레드에서 동시에 호출되므로 결과는 출력하지 않고 파싱된 딕셔너리만 반환합니다.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            result = analyze_image(client, str(Path(img_name)), prompt, RETRY_DETAIL)
+        except Exception as e:
+            error = e
+            retryable = is_retryable_error(e)
+        else:
+            if not result["success"]:
+                # analyze_image는 API 실패를 예외 대신 success=False 딕셔너리로 반환 (원래 예외는 exception)
+                error = result.get("exception") or RuntimeError(result.get("error"))
+                retryable = is_retryable_error(error)
+            else:
+                parsed = parse_gemini_response(result["result"])
+                if "raw_response" not in parsed:
+                    return parsed
+                # 응답은 받았지만 JSON이 깨짐 → 잘린 응답일 수 있으므로 재시도
+                error = ValueError("응답 JSON 파싱 실패")
+                retryable = True
+        
+        if not retryable:
+            raise RuntimeError(f"재시도하지 않는 오류: {error}") from error
+        if attempt == MAX_ATTEMPTS:
+            raise RuntimeError(f"{MAX_ATTEMPTS}회 시도 실패: {error}") from error
+        
+        delay = random.uniform(BACKOFF_MIN, min(BACKOFF_MAX, BACKOFF_MIN * 2 ** attempt))
+        print(f"  ⏳ 재시도 대기 {delay:.1f}초 ({attempt}/{MAX_ATTEMPTS}): {img_name} ({error})")
+        time.sleep(delay)
+
+
+# 최신 결과 파일 찾기 (scandir 한 번으로 이름 필터 + 수정 시간 조회)
 OUTPUT_DIR = Path("output")
-result_files = sorted(OUTPUT_DIR.glob("vlm_analysis_result_*.xlsx"), key=lambda x: x.stat().st_mtime, reverse=True)
+result_files = []
+if OUTPUT_DIR.is_dir():
+    with os.scandir(OUTPUT_DIR) as entries:
+        result_files = [
+            (entry.stat().st_mtime, entry.path)
+            for entry in entries
+            if entry.name.startswith("vlm_analysis_result_") and entry.name.endswith(".xlsx") and entry.is_file()
+        ]
 
 if not result_files:
     print("❌ 결과 파일이 없습니다.")
     exit(1)
 
-latest_file = result_files[0]
+latest_file = Path(max(result_files)[1])
 print(f"📂 최신 결과 파일: {latest_file.name}")
 
-# 에러 행 찾기
-df = pd.read_excel(latest_file)
-error_rows = df[df['Cat'] == 'Error']
+# 에러 행 찾기 (read_only 스트리밍으로 Cat/Image 열만 확인, DataFrame 생성 없음)
+wb = load_workbook(latest_file, read_only=True, data_only=True)
+try:
+    rows = wb.active.iter_rows(values_only=True)
+    header = next(rows, ())
+    cat_i = header.index('Cat')
+    img_i = header.index('Image')
+    
+    error_count = 0
+    failed_images = set()
+    for row in rows:
+        if row[cat_i] == 'Error':
+            error_count += 1
+            failed_images.add(row[img_i])
+finally:
+    wb.close()
 
-if len(error_rows) == 0:
+if error_count == 0:
     print("✅ 실패한 이미지가 없습니다!")
     exit(0)
 
-print(f"\n⚠️ 실패한 이미지 {len(error_rows)}개 발견:")
-failed_images = error_rows['Image'].unique().tolist()
+print(f"\n⚠️ 실패한 이미지 {error_count}개 발견:")
+# 이미지명이 빈 에러 행은 재분석 대상이 아님, 출력/처리 순서는 이름순으로 고정
+failed_images.discard(None)
+failed_images = sorted(failed_images, key=str)
 for img in failed_images:
     print(f"  - {img}")
 
 print("\n🔄 재분석 시작...")
 
-# 기준정보 로드
+# 기준정보 로드 후 프롬프트/클라이언트는 한 번만 준비해 모든 스레드가 공유
 references = load_all_references()
+prompt = create_analysis_prompt(references)
+client = get_client()
 
-# 각 이미지 재분석
+# 없는 파일은 먼저 걸러냄
+targets = []
 for img_name in failed_images:
-    img_path = Path(img_name)
-    if not img_path.exists():
+    if Path(img_name).exists():
+        targets.append(img_name)
+    else:
         print(f"❌ 파일을 찾을 수 없습니다: {img_name}")
-        continue
-    
-    print(f"\n🔍 재분석 중: {img_name}")
-    try:
-        result = analyze_single_image(str(img_path), references)
-        print(f"  ✅ 성공")
-    except Exception as e:
-        print(f"  ❌ 실패: {e}")
-
-print("\n✅ 재분석 완료! vlm_test.py를 다시 실행하거나 수동으로 결과를 추가하세요.")
+
+# 각 이미지 재분석 (여러 건의 API 호출을 동시에 진행)
+print(f"\n🔍 {len(targets)}개 이미지 재분석 중 (동시 {RETRY_WORKERS}개)...")
+rows_by_image = {}
+with ThreadPoolExecutor(max_workers=RETRY_WORKERS) as executor:
+    futures = {
+        executor.submit(analyze_with_backoff, img_name, client, prompt): img_name
+        for img_name in targets
+    }
+    for future in as_completed(futures):
+        img_name = futures[future]
+        # 출력은 메인 스레드에서만 → 여러 이미지 결과가 섞이지 않음
+        try:
+            parsed = future.result()
+        except Exception as e:
+            print(f"  ❌ 실패: {img_name} ({e})")
+            continue
+        
+        if not isinstance(parsed, dict):
+            # 최상위가 JSON 배열 등 예상과 다른 형식 → 호출은 성공했으므로 원문을 에러 행으로 보존
+            print(f"  ⚠️ 응답 형식이 예상과 다름: {img_name}")
+            rows = [(img_name, "Error", "Parse Failed", "Raw Response", str(parsed)[:500])]
+        else:
+            rows = flatten_to_vertical(parsed, img_name)
+            print(f"  ✅ 성공: {img_name} (의류 {len(parsed.get('Clothing', []))}개)")
+        rows_by_image[img_name] = rows
+        
+        print("-" * 100)
+        print(f"{'Cat':<25} {'Subcat':<20} {'Key':<25} {'Value':<25}")
+        print("-" * 100)
+        for _, cat, subcat, key, value in rows:
+            val = value[:25] if len(value) > 25 else value
+            print(f"{cat:<25} {subcat:<20} {key:<25} {val:<25}")
+
+if not rows_by_image:
+    print("\n❌ 재분석에 성공한 이미지가 없습니다.")
+    exit(1)
+
+# 재분석 결과를 원본 결과 파일 옆에 저장 (이미지 순서는 실패 목록과 동일)
+# vlm_analysis_result_* 이름이면 다음 실행/대시보드가 최신 결과로 잘못 고르므로 접두어를 바꿈
+retry_file = latest_file.with_name(latest_file.name.replace("vlm_analysis_result_", "vlm_retry_result_", 1))
+wb = Workbook(write_only=True)
+ws = wb.create_sheet("Results")
+ws.append(RESULT_COLUMNS)
+for img_name in targets:
+    for row in rows_by_image.get(img_name, ()):
+        ws.append(row)
+wb.save(retry_file)
+
+print(f"\n💾 재분석 결과 저장: {retry_file} ({len(rows_by_image)}/{len(targets)}장)")
+print("✅ 재분석 완료! 원본 결과 파일의 에러 행을 이 파일의 결과로 교체하세요.")
 
 
 
@@ -9,16 +9,46 @@ Gemini VLM(Vision Language Model) 이미지 분석 테스트 스크립트
 import os
 import json
 import time
+import random
+import base64
+import mimetypes
+import tempfile
+import functools
+import hashlib
+import threading
+import re
+from itertools import islice, zip_longest
 from pathlib import Path
 from datetime import datetime
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import httpx
 from google import genai
 from google.genai import types
 import pandas as pd
-from PIL import Image as PILImage
+from PIL import Image as PILImage, ImageOps
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
 from openpyxl.drawing.image import Image as XLImage
 from dotenv import load_dotenv
 
+try:
+    import orjson  # 있으면 C 구현 JSON 파서 사용
+except ImportError:
+    orjson = None
+
+try:
+    import xlsxwriter  # 있으면 결과 엑셀을 constant_memory 모드로 저장 (대용량 결과 메모리 절약)
+except ImportError:
+    xlsxwriter = None
+
+try:
+    import pyarrow as pa  # 있으면 결과를 Parquet으로도 저장 (기계 처리용)
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
 # 기준정보 Python 파일에서 import
 from category_attributes import (
     COMMON_ATTRIBUTES,
@@ -41,6 +71,45 @@ REFERENCE_DIR = BASE_DIR / "reference"
 # 기준정보 엑셀 파일 경로
 MARKETING_REF_FILE = BASE_DIR / "마케팅 기준정보.xlsx"
 CATEGORY_REF_FILE = BASE_DIR / "F&F_odd key_values_ver.02_251201.xlsx"
+REFERENCE_JSON_FILE = REFERENCE_DIR / "parsed_references.json"  # 파싱 결과 캐시
+
+# 업로드 이미지 최대 긴 변 (px) / 축소 시 JPEG 품질
+MAX_UPLOAD_EDGE = 1024
+UPLOAD_JPEG_QUALITY = 85
+UPLOAD_CACHE_DIR = OUTPUT_DIR / ".cache"  # 축소한 업로드 이미지 캐시 (재실행 시 리사이즈 생략)
+IMAGE_DETAIL_LEVELS = ("low", "medium", "high")  # 이미지 토큰 해상도 (Gemini media_resolution)
+REMOTE_IMAGE_PREFIXES = ("gs://", "https://", "http://")  # 이 경로는 업로드 없이 URI 참조로 전달
+ENCODED_IMAGE_CACHE_SIZE = 64  # 메모리에 보관하는 업로드 바이트 수 (동시 요청 10 x 배치 4장이 재시도해도 다시 읽지 않음)
+
+# 분석에 사용하는 Gemini 모델 / 요청 타임아웃 (ms, 여러 장 배치 응답도 끊기지 않도록 여유 있게)
+GEMINI_MODEL = "gemini-3-pro-preview"
+GEMINI_TIMEOUT_MS = 300_000
+
+# Batch API (use_batch_api=True): 이 수보다 적으면 실시간 요청, 상태 조회 간격(초) 범위
+BATCH_API_MIN_IMAGES = 20
+BATCH_POLL_MIN_WAIT = 10
+BATCH_POLL_MAX_WAIT = 300
+BATCH_PREPARE_WORKERS = 16  # 요청 JSONL 작성 시 이미지 읽기/축소/인코딩 동시 작업 수
+BATCH_DONE_STATES = frozenset({"JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"})
+
+# Gemini 일시적 오류 재시도 (최대 시도 횟수 / 지수 백오프 기본 대기 초)
+API_MAX_ATTEMPTS = 3
+API_BACKOFF_BASE = 1.0
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 503, 504})  # 한도 초과, 서버 오류, 시간 초과
+
+# 분석 결과 컬럼 (flatten_to_vertical 행 튜플 순서)
+RESULT_COLUMNS = ["Image", "Cat", "Subcat", "Key", "Value"]
+
+# 결과 엑셀 열 너비 (Image, Cat, Subcat, Key, Value) / 썸네일 크기(px) / 썸네일 행 높이
+EXCEL_COLUMN_WIDTHS = {'A': 15, 'B': 25, 'C': 20, 'D': 25, 'E': 40}
+THUMBNAIL_SIZE = 80
+THUMBNAIL_ROW_HEIGHT = 65
+
+# 엑셀에서 빈 값으로 취급하는 문자열 (pd.read_excel 기본 na_values와 동일)
+_EXCEL_NA_STRINGS = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+})
 
 
 def setup_gemini():
@@ -56,31 +125,82 @@ def setup_gemini():
         )
     
     # 새로운 SDK 방식
-    client = genai.Client(api_key=api_key)
+    client = genai.Client(
+        api_key=api_key,
+        http_options=types.HttpOptions(timeout=GEMINI_TIMEOUT_MS)
+    )
     return client
 
 
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """프로세스 안에서 재사용하는 Gemini 클라이언트 (연결 풀/인증을 호출마다 새로 만들지 않음)
+    
+    여러 스레드가 동시에 처음 호출해도 클라이언트는 하나만 만듭니다.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = setup_gemini()
+    return _client
+
+
 # =============================================================================
 # 기준정보 파싱 함수들
 # =============================================================================
 
+def file_key(path: Path):
+    """캐시 키용 파일 상태 (수정 시간 ns, 크기). 파일이 없으면 None."""
+    try:
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def read_sheet_rows(file_path: str) -> list:
+    """엑셀 첫 번째 시트의 행 값 목록 (openpyxl read_only 스트리밍, DataFrame 생성 없음)"""
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        return list(wb.worksheets[0].iter_rows(values_only=True))
+    finally:
+        wb.close()
+
+
+def is_blank_cell(value) -> bool:
+    """pd.read_excel에서 NaN이 되는 셀인지 체크 (None, 빈 값 문자열)"""
+    return value is None or (isinstance(value, str) and value in _EXCEL_NA_STRINGS)
+
+
 def parse_marketing_reference(file_path: str = None) -> dict:
-    """마케팅 기준정보 엑셀을 파싱합니다."""
+    """마케팅 기준정보 엑셀을 파싱합니다. (파일이 바뀌지 않았으면 이전 파싱 결과 재사용)"""
     file_path = file_path or MARKETING_REF_FILE
     
-    if not Path(file_path).exists():
+    key = file_key(file_path)
+    if key is None:
         print(f"⚠️ 마케팅 기준정보 파일이 없습니다: {file_path}")
         return {}
     
-    df = pd.read_excel(file_path, header=None)
+    return _parse_marketing_reference(str(file_path), key)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_marketing_reference(file_path: str, key: tuple) -> dict:
+    """parse_marketing_reference 본체 (key: file_key 결과, 캐시 키로만 사용)"""
+    rows = read_sheet_rows(file_path)
     reference = {}
     
-    for col_idx in range(1, len(df.columns)):
-        col_data = df.iloc[:, col_idx].dropna().tolist()
+    # 행 목록을 한 번에 열 단위로 전치 (짧은 행은 None으로 채움), 첫 열은 건너뜀
+    for column in islice(zip_longest(*rows), 1, None):
+        col_data = [v for v in column if not is_blank_cell(v)]
         
         if len(col_data) >= 2:
             key_name = str(col_data[0]).strip()
-            values = [str(v).strip() for v in col_data[1:] if pd.notna(v) and str(v).strip()]
+            values = [s for s in (str(v).strip() for v in col_data[1:]) if s]
             
             if key_name and not key_name[0].isascii():
                 reference[key_name] = values
@@ -90,36 +210,71 @@ def parse_marketing_reference(file_path: str = None) -> dict:
 
 
 def parse_category_reference(file_path: str = None) -> dict:
-    """의류 카테고리 기준정보 엑셀을 파싱합니다."""
+    """의류 카테고리 기준정보 엑셀을 파싱합니다. (파일이 바뀌지 않았으면 이전 파싱 결과 재사용)"""
     file_path = file_path or CATEGORY_REF_FILE
     
-    if not Path(file_path).exists():
+    key = file_key(file_path)
+    if key is None:
         print(f"⚠️ 카테고리 기준정보 파일이 없습니다: {file_path}")
         return {}
     
-    df = pd.read_excel(file_path)
+    return _parse_category_reference(str(file_path), key)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_category_reference(file_path: str, key: tuple) -> dict:
+    """parse_category_reference 본체 (key: file_key 결과, 캐시 키로만 사용)"""
+    rows = read_sheet_rows(file_path)
+    header = list(rows[0]) if rows else []
+    cat_idx = header.index('cat')
+    sub_cat_idx = header.index('sub_cat')
     
+    # cat 등장 순서대로 sub_cat 수집 (cat이 빈 행은 건너뜀)
     reference = {}
-    for cat in df['cat'].unique():
-        sub_cats = df[df['cat'] == cat]['sub_cat'].dropna().tolist()
-        reference[cat] = sub_cats
+    for row in rows[1:]:
+        cat = row[cat_idx] if cat_idx < len(row) else None
+        if is_blank_cell(cat):
+            continue
+        sub_cats = reference.setdefault(cat, [])
+        sub_cat = row[sub_cat_idx] if sub_cat_idx < len(row) else None
+        if not is_blank_cell(sub_cat):
+            sub_cats.append(sub_cat)
     
     print(f"✓ 카테고리 기준정보 로드 완료: {len(reference)}개 대분류")
     return reference
 
 
 def load_all_references() -> dict:
-    """모든 기준정보를 로드합니다."""
-    return {
+    """모든 기준정보를 로드합니다.
+    
+    parsed_references.json이 두 기준정보 엑셀보다 최신이면 엑셀 파싱 없이 JSON을 읽고,
+    아니면 엑셀을 파싱한 뒤 JSON을 다시 저장합니다.
+    같은 프로세스에서는 엑셀 파싱 결과가 캐시와 공유되므로 반환값을 수정하지 마세요.
+    """
+    source_keys = [file_key(MARKETING_REF_FILE), file_key(CATEGORY_REF_FILE)]
+    json_key = file_key(REFERENCE_JSON_FILE)
+    
+    if json_key and all(source_keys) and all(json_key[0] > key[0] for key in source_keys):
+        try:
+            with open(REFERENCE_JSON_FILE, encoding='utf-8') as f:
+                references = json.load(f)
+            print(f"✓ 기준정보 JSON 캐시 사용: {REFERENCE_JSON_FILE}")
+            return references
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ 기준정보 JSON 캐시를 읽지 못해 엑셀을 다시 파싱합니다: {e}")
+    
+    references = {
         "marketing": parse_marketing_reference(),
         "category": parse_category_reference()
     }
+    save_references_to_json(references)
+    return references
 
 
 def save_references_to_json(references: dict, output_path: str = None):
     """파싱된 기준정보를 JSON 파일로 저장합니다."""
     REFERENCE_DIR.mkdir(exist_ok=True)
-    output_path = output_path or (REFERENCE_DIR / "parsed_references.json")
+    output_path = output_path or REFERENCE_JSON_FILE
     
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(references, f, ensure_ascii=False, indent=2)
@@ -133,25 +288,112 @@ def save_references_to_json(references: dict, output_path: str = None):
 # =============================================================================
 
 def encode_image(image_path: str) -> bytes:
-    """이미지를 바이트로 읽습니다."""
-    with open(image_path, 'rb') as f:
-        return f.read()
+    """이미지를 바이트로 읽습니다. (같은 파일을 다시 보내면 읽은 바이트 재사용)
+    
+    긴 변이 MAX_UPLOAD_EDGE보다 크면 축소한 JPEG로 다시 인코딩하고,
+    축소본은 UPLOAD_CACHE_DIR에 저장해 다음 실행에서 재사용합니다.
+    """
+    return _read_image_bytes(str(image_path), file_key(image_path))
+
+
+def _sniff_mime(head: bytes) -> str:
+    """파일 앞부분 시그니처로 이미지 MIME 타입 판별 (모르는 형식은 image/jpeg)"""
+    if head.startswith(b'\x89PNG'):
+        return "image/png"
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return "image/webp"
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return "image/gif"
+    return "image/jpeg"
 
 
-def analyze_image(client, image_path: str, analysis_prompt: str) -> dict:
-    """Gemini를 사용하여 이미지를 분석합니다."""
+@functools.lru_cache(maxsize=ENCODED_IMAGE_CACHE_SIZE)
+def _read_image_bytes(image_path: str, key: tuple) -> bytes:
+    """encode_image 본체 (key: file_key 결과, 파일이 바뀌면 새로 읽음)"""
+    with open(image_path, 'rb') as f:
+        data = f.read()
+    
+    # 원본 내용 + 축소 설정이 같으면 이전 실행에서 만든 축소본 재사용
+    digest = hashlib.sha1(data)
+    digest.update(f"{MAX_UPLOAD_EDGE}:{UPLOAD_JPEG_QUALITY}".encode())
+    cache_path = UPLOAD_CACHE_DIR / f"{digest.hexdigest()}.jpg"
     try:
-        image_data = encode_image(image_path)
+        return cache_path.read_bytes()
+    except OSError:
+        pass
+    
+    with PILImage.open(BytesIO(data)) as img:
+        if max(img.size) <= MAX_UPLOAD_EDGE:
+            return data  # 작은 이미지는 원본 그대로
         
-        # 새로운 SDK 방식으로 이미지 파트 생성
-        image_part = types.Part.from_bytes(
-            data=image_data,
-            mime_type="image/jpeg"
-        )
+        # 회전 정보(EXIF) 반영 후 축소 → 메타데이터 없이 저장되어도 방향 유지
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((MAX_UPLOAD_EDGE, MAX_UPLOAD_EDGE), PILImage.LANCZOS)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        
+        buffer = BytesIO()
+        img.save(buffer, format='JPEG', quality=UPLOAD_JPEG_QUALITY, optimize=True)
+    
+    resized = buffer.getvalue()
+    try:
+        # 임시 파일에 쓴 뒤 교체 (동시 요청 스레드가 같은 파일을 써도 깨진 캐시가 남지 않음)
+        UPLOAD_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.{id(buffer)}.tmp")
+        tmp_path.write_bytes(resized)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # 캐시 저장 실패는 무시 (다음 실행에서 다시 축소)
+    return resized
+
+
+def is_remote_image(image_path) -> bool:
+    """클라우드 저장소(gs://)나 URL에 있는 이미지인지 체크"""
+    return str(image_path).startswith(REMOTE_IMAGE_PREFIXES)
+
+
+def remote_image_mime(image_uri: str) -> str:
+    """URI 확장자로 MIME 타입 추정 (모르면 image/jpeg)"""
+    mime_type, _ = mimetypes.guess_type(image_uri)
+    return mime_type if mime_type and mime_type.startswith("image/") else "image/jpeg"
+
+
+def make_image_part(image_path) -> types.Part:
+    """요청에 넣을 이미지 파트를 만듭니다.
+    
+    원격 이미지는 base64로 본문에 싣지 않고 URI만 전달해 API가 직접 가져오게 하고,
+    로컬 파일은 읽은 바이트를 첨부합니다. (MIME 타입은 파일 시그니처로 판별)
+    """
+    if is_remote_image(image_path):
+        return types.Part.from_uri(file_uri=str(image_path), mime_type=remote_image_mime(str(image_path)))
+    
+    image_data = encode_image(image_path)
+    return types.Part.from_bytes(data=image_data, mime_type=_sniff_mime(image_data[:12]))
+
+
+def media_resolution_name(detail: str) -> str:
+    """이미지 상세도('low'/'medium'/'high') → Gemini MediaResolution 값 이름"""
+    if detail not in IMAGE_DETAIL_LEVELS:
+        raise ValueError(f"detail은 {IMAGE_DETAIL_LEVELS} 중 하나여야 합니다: {detail}")
+    return f"MEDIA_RESOLUTION_{detail.upper()}"
+
+
+def media_resolution(detail: str):
+    """이미지 1장이 차지하는 토큰 수를 정하는 media_resolution 설정 (None이면 API 기본값)"""
+    if detail is None:
+        return None
+    return types.MediaResolution(media_resolution_name(detail))
+
+
+def analyze_image(client, image_path: str, analysis_prompt: str, detail: str = None) -> dict:
+    """Gemini를 사용하여 이미지를 분석합니다. (detail: 이미지 상세도, None이면 API 기본값)"""
+    try:
+        image_part = make_image_part(image_path)
         
         response = client.models.generate_content(
-            model="gemini-3-pro-preview",
-            contents=[analysis_prompt, image_part]
+            model=GEMINI_MODEL,
+            contents=[analysis_prompt, image_part],
+            config=types.GenerateContentConfig(media_resolution=media_resolution(detail)) if detail else None
         )
         
         return {
@@ -164,14 +406,13 @@ def analyze_image(client, image_path: str, analysis_prompt: str) -> dict:
         return {
             "success": False,
             "error": str(e),
+            "exception": e,  # 재시도 여부 판단용 (is_retryable_error)
             "image_path": str(image_path)
         }
 
 
-def create_analysis_prompt(references: dict = None) -> str:
-    """명시적으로 모든 속성을 나열하여 정확도를 높인 프롬프트를 생성합니다."""
-    
-    prompt = """Analyze this fashion image. Extract ALL visible clothing items separately.
+# 분석 프롬프트 (기준정보와 무관한 고정 문자열이므로 import 시 한 번만 생성)
+_ANALYSIS_PROMPT = """Analyze this fashion image. Extract ALL visible clothing items separately.
 
 ## OUTPUT FORMAT (JSON only, English values):
 {
@@ -334,49 +575,128 @@ def create_analysis_prompt(references: dict = None) -> str:
 6. MULTI-VALUE ALLOWED: If multiple values apply, use comma-separated format (e.g., "sitting, full body shot", "smile, wink", "street, casual")
 7. color should be an array if multiple colors visible (e.g., ["red", "white", "blue"])
 """
-    return prompt
+
+
+# 배치 응답 구조화 출력 스키마 (response_json_schema, 유효한 JSON만 생성되도록 강제)
+# 의류 attributes는 카테고리마다 키가 달라 키를 고정하지 않고 문자열/문자열 배열만 허용
+MARKETING_FIELDS = (
+    "age group", "color tone filter", "coordination method", "gender", "skin tone", "pose",
+    "hair style", "expression", "gaze direction", "fashion style", "location", "mood",
+    "number of people", "overall fashion color tone", "season weather", "shooting composition"
+)
+
+_STRING_OR_LIST_SCHEMA = {"anyOf": [{"type": "string"}, {"type": "array", "items": {"type": "string"}}]}
+
+_ANALYSIS_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "file_name": {"type": "string"},
+                    "analysis": {
+                        "type": "object",
+                        "properties": {
+                            "Clothing": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "cat": {"type": "string"},
+                                        "subcat": {"type": "string"},
+                                        "brand": {"type": "string"},
+                                        "product_name": {"type": "string"},
+                                        "attributes": {"type": "object", "additionalProperties": _STRING_OR_LIST_SCHEMA}
+                                    },
+                                    "required": ["cat", "subcat", "attributes"]
+                                }
+                            },
+                            "Marketing": {
+                                "type": "object",
+                                "properties": {name: {"type": "string"} for name in MARKETING_FIELDS},
+                                "required": list(MARKETING_FIELDS)
+                            }
+                        },
+                        "required": ["Clothing", "Marketing"]
+                    }
+                },
+                "required": ["file_name", "analysis"]
+            }
+        }
+    },
+    "required": ["results"]
+}
+
+
+def create_analysis_prompt(references: dict = None) -> str:
+    """명시적으로 모든 속성을 나열하여 정확도를 높인 프롬프트를 반환합니다. (references는 호환용, 사용하지 않음)"""
+    return _ANALYSIS_PROMPT
+
+
+def strip_code_fence(response_text: str) -> str:
+    """응답에서 코드 펜스 안의 본문만 추출 (```json 블록 우선, 펜스가 없으면 원문)"""
+    match = _JSON_FENCE_RE.search(response_text) or _FENCE_RE.search(response_text)
+    return match.group(1) if match else response_text
+
+
+def loads_json(json_str: str):
+    """JSON 문자열 파싱 (orjson이 있으면 사용, 실패 시 json.JSONDecodeError 계열 예외)"""
+    if orjson is not None:
+        return orjson.loads(json_str)
+    return json.loads(json_str)
 
 
 def parse_gemini_response(response_text: str) -> dict:
     """Gemini 응답에서 JSON을 파싱합니다."""
     try:
-        if "```json" in response_text:
-            json_str = response_text.split("```json")[1].split("```")[0]
-        elif "```" in response_text:
-            json_str = response_text.split("```")[1].split("```")[0]
-        else:
-            json_str = response_text
-        
-        return json.loads(json_str.strip())
+        return loads_json(strip_code_fence(response_text).strip())
     except json.JSONDecodeError:
         return {"raw_response": response_text}
 
 
+# 응답의 코드 펜스(```json ... ```) 본문 추출용 정규식 (닫는 펜스가 없으면 끝까지)
+_JSON_FENCE_RE = re.compile(r"```json(.*?)(?:```|\Z)", re.DOTALL)
+_FENCE_RE = re.compile(r"```(.*?)(?:```|\Z)", re.DOTALL)
+
+# 응답에서 빈 값으로 취급하는 값 (strip + 소문자 기준)
+_EMPTY_TOKENS = frozenset({"unknown", "none", "n/a", "null", "undefined", ""})
+
+
+def clean_value(v) -> str:
+    """Unknown, None 값을 빈 문자열로 변환합니다."""
+    if v is None:
+        return ""
+    return _clean_str(v if isinstance(v, str) else str(v))
+
+
+@functools.lru_cache(maxsize=4096)
+def _clean_str(v_str: str) -> str:
+    """clean_value의 문자열 처리 (속성값 어휘가 작아 같은 문자열이 반복되므로 캐시)"""
+    v_str = v_str.strip()
+    return "" if v_str.lower() in _EMPTY_TOKENS else v_str
+
+
 def flatten_to_vertical(parsed_data: dict, image_name: str) -> list:
     """
     JSON을 Cat, Subcat, Key, Value 형식으로 변환합니다.
+    
+    Returns:
+        list: 행 튜플 리스트 (RESULT_COLUMNS 순서: Image, Cat, Subcat, Key, Value)
     """
     rows = []
     
     if "raw_response" in parsed_data:
-        rows.append({
-            "Image": image_name,
-            "Cat": "Error",
-            "Subcat": "Parse Failed",
-            "Key": "Raw Response",
-            "Value": parsed_data["raw_response"][:500]
-        })
+        rows.append((
+            image_name,
+            "Error",
+            "Parse Failed",
+            "Raw Response",
+            parsed_data["raw_response"][:500]
+        ))
         return rows
     
-    # Unknown, None 값을 빈 문자열로 변환하는 함수
-    def clean_value(v):
-        if v is None:
-            return ""
-        v_str = str(v).strip()
-        if v_str.lower() in ["unknown", "none", "n/a", "null", "undefined"]:
-            return ""
-        return v_str
-    
     # 의류 정보 처리 (Clothing) - 배열로 여러 아이템 처리
     clothing_list = parsed_data.get("Clothing", [])
     
@@ -395,73 +715,73 @@ def flatten_to_vertical(parsed_data: dict, image_name: str) -> list:
         
         # 브랜드 정보 추가
         if brand:
-            rows.append({
-                "Image": image_name,
-                "Cat": cat if first_row else "",
-                "Subcat": subcat if first_row else "",
-                "Key": "brand",
-                "Value": brand
-            })
+            rows.append((
+                image_name,
+                cat if first_row else "",
+                subcat if first_row else "",
+                "brand",
+                brand
+            ))
             first_row = False
         
         # 제품명 정보 추가
         if product_name:
-            rows.append({
-                "Image": image_name,
-                "Cat": cat if first_row else "",
-                "Subcat": subcat if first_row else "",
-                "Key": "product_name",
-                "Value": product_name
-            })
+            rows.append((
+                image_name,
+                cat if first_row else "",
+                subcat if first_row else "",
+                "product_name",
+                product_name
+            ))
             first_row = False
         
         for key, value in attributes.items():
             if isinstance(value, list):
                 # 배열인 경우 쉼표로 합쳐서 한 행으로
-                cleaned_values = [clean_value(v) for v in value if clean_value(v)]
+                cleaned_values = [c for c in map(clean_value, value) if c]
                 if cleaned_values:
-                    rows.append({
-                        "Image": image_name,
-                        "Cat": cat if first_row else "",
-                        "Subcat": subcat if first_row else "",
-                        "Key": key,
-                        "Value": ", ".join(cleaned_values)
-                    })
+                    rows.append((
+                        image_name,
+                        cat if first_row else "",
+                        subcat if first_row else "",
+                        key,
+                        ", ".join(cleaned_values)
+                    ))
                     first_row = False
             else:
                 cleaned = clean_value(value)
                 if cleaned:  # 빈 값이 아닌 경우만 추가
-                    rows.append({
-                        "Image": image_name,
-                        "Cat": cat if first_row else "",
-                        "Subcat": subcat if first_row else "",
-                        "Key": key,
-                        "Value": cleaned
-                    })
+                    rows.append((
+                        image_name,
+                        cat if first_row else "",
+                        subcat if first_row else "",
+                        key,
+                        cleaned
+                    ))
                     first_row = False
         
         # 속성이 하나도 없으면 cat, subcat만이라도 추가
         if first_row and (cat or subcat):
-            rows.append({
-                "Image": image_name,
-                "Cat": cat,
-                "Subcat": subcat,
-                "Key": "",
-                "Value": ""
-            })
+            rows.append((
+                image_name,
+                cat,
+                subcat,
+                "",
+                ""
+            ))
     
     # 마케팅 속성 처리 (Marketing)
     marketing = parsed_data.get("Marketing", {})
     for attr_name, attr_value in marketing.items():
         cleaned = clean_value(attr_value)
         if cleaned:  # 빈 값이 아닌 경우만 추가
-            rows.append({
-                "Image": image_name,
-                "Cat": attr_name,
-                "Subcat": "",
-                "Key": "",
-                "Value": cleaned
-            })
+            rows.append((
+                image_name,
+                attr_name,
+                "",
+                "",
+                cleaned
+            ))
     
     return rows
 
@@ -470,17 +790,320 @@ def flatten_to_vertical(parsed_data: dict, image_name: str) -> list:
 # 배치 분석 및 저장
 # =============================================================================
 
+def analyze_image_chunk(client, chunk: list, prompt: str, detail: str = None) -> list:
+    """이미지 여러 장을 API 한 번 호출로 분석합니다.
+    
+    Args:
+        client: Gemini 클라이언트
+        chunk: 이미지 경로 리스트
+        prompt: 배치 지시가 포함된 분석 프롬프트
+        detail: 이미지 상세도 ('low'/'medium'/'high', None이면 API 기본값)
+    
+    Returns:
+        list: 이미지 순서대로 분석 dict (응답에서 빠진 이미지는 None)
+    """
+    # 1. 이번 배치의 이미지 데이터들 준비 (여러 장이면 이미지마다 파일명 구분자 추가)
+    contents = [prompt]  # 프롬프트 먼저 넣고
+    multi = len(chunk) > 1
+    for img_path in chunk:
+        if multi:
+            contents.append(f"--- next image: {Path(img_path).name} ---")
+        contents.append(make_image_part(img_path))
+    
+    # 2. API 한 번 호출로 여러 이미지 동시 분석
+    response = client.models.generate_content(
+        model=GEMINI_MODEL,
+        contents=contents,
+        config=types.GenerateContentConfig(
+            response_mime_type="application/json",  # JSON 강제 모드 (토큰 절약)
+            response_json_schema=_ANALYSIS_RESPONSE_SCHEMA,  # 스키마에 맞는 JSON만 생성
+            media_resolution=media_resolution(detail)
+        )
+    )
+    
+    # 3. 결과 파싱 및 매핑
+    return parse_chunk_response(response.text, chunk)
+
+
+def _decode_first_json(response_text: str):
+    """코드 펜스나 뒤에 붙은 텍스트가 있는 응답에서 첫 번째 JSON 값만 파싱 (Extra data 에러 방지)"""
+    # JSON 외 텍스트 제거 (```json ... ``` 형태 처리)
+    response_text = strip_code_fence(response_text).strip()
+    
+    # 첫 번째 유효한 JSON 객체만 추출 (raw_decode 사용)
+    decoder = json.JSONDecoder()
+    try:
+        # raw_decode는 첫 번째 완전한 JSON만 파싱하고 나머지 무시
+        result_json, _ = decoder.raw_decode(response_text)
+    except json.JSONDecodeError:
+        # { 로 시작하는 부분 찾기
+        start_idx = response_text.find('{')
+        if start_idx != -1:
+            result_json, _ = decoder.raw_decode(response_text[start_idx:])
+        else:
+            raise
+    return result_json
+
+
+def parse_chunk_response(response_text: str, chunk: list) -> list:
+    """배치 응답 텍스트를 이미지 순서대로 분석 dict 목록으로 변환합니다. (맞출 수 없는 이미지는 None)"""
+    response_text = response_text.strip()
+    
+    try:
+        # 구조화 출력 응답은 그대로 유효한 JSON → 한 번에 파싱 (orjson이 있으면 사용)
+        result_json = loads_json(response_text)
+    except json.JSONDecodeError:
+        result_json = _decode_first_json(response_text)
+    
+    # 혹시 리스트로 바로 줄 경우도 처리
+    if isinstance(result_json, list):
+        results_list = result_json
+    else:
+        results_list = result_json.get("results", [])
+    
+    # 구조에 따라 분석 데이터 추출
+    def analysis_of(item):
+        return item.get("analysis", item) if isinstance(item, dict) else None
+    
+    if len(chunk) == 1:
+        return [analysis_of(results_list[0]) if results_list else None]
+    
+    # 여러 장이면 file_name으로 먼저 매칭 (응답에서 빠진 이미지만 None → 그 이미지만 1장씩 재요청)
+    by_name = {
+        item["file_name"]: item for item in results_list
+        if isinstance(item, dict) and isinstance(item.get("file_name"), str)
+    }
+    names = [Path(img_path).name for img_path in chunk]
+    if any(name in by_name for name in names):
+        return [analysis_of(by_name[name]) if name in by_name else None for name in names]
+    
+    # file_name이 하나도 맞지 않을 때만 순서로 매칭
+    # 개수 불일치 안전장치: 결과 수가 이미지 수와 다르면 순서를 믿을 수 없으므로 전부 None (1장씩 재요청)
+    if len(results_list) != len(chunk):
+        return [None] * len(chunk)
+    return [analysis_of(item) for item in results_list]
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """다시 요청하면 성공할 수 있는 일시적 오류인지 체크 (429/5xx, 연결 끊김/타임아웃, 잘린 JSON 응답)"""
+    # google-genai는 httpx로 요청 → 소켓 끊김/타임아웃은 내장 ConnectionError/TimeoutError가 아닌 httpx.TransportError 계열
+    if isinstance(error, (json.JSONDecodeError, ConnectionError, TimeoutError, httpx.TransportError)):
+        return True
+    # google.genai.errors.APIError 계열은 HTTP 상태 코드를 code 속성으로 가짐
+    return getattr(error, "code", None) in RETRYABLE_STATUS_CODES
+
+
+def retry_after_seconds(error: Exception):
+    """응답 헤더의 Retry-After(초)를 읽습니다. 없거나 숫자가 아니면 None"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    try:
+        return max(0.0, float(headers.get("retry-after")))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def call_with_retry(func, *args, max_attempts: int = API_MAX_ATTEMPTS, base: float = API_BACKOFF_BASE):
+    """func(*args)를 호출하고, 일시적 오류면 지수 백오프 + 지터로 다시 호출합니다.
+    
+    Retry-After 헤더가 있으면 그 시간을 우선 사용합니다.
+    일시적 오류가 아니거나 max_attempts번 모두 실패하면 마지막 예외를 그대로 냅니다.
+    """
+    for attempt in range(max_attempts):
+        try:
+            return func(*args)
+        except Exception as e:
+            if attempt == max_attempts - 1 or not is_retryable_error(e):
+                raise
+            delay = retry_after_seconds(e)
+            if delay is None:
+                delay = base * 2 ** attempt + random.uniform(0, 0.5)
+            print(f"  ⏳ 일시적 오류, {delay:.1f}초 후 재시도 ({attempt + 1}/{max_attempts}): {e}")
+            time.sleep(delay)
+
+
+def exception_row(img_path: str, error: Exception) -> tuple:
+    """분석 중 예외가 난 이미지의 에러 행 (RESULT_COLUMNS 순서)"""
+    return (Path(img_path).name, "Error", "", "Exception", str(error))
+
+
+def analyze_chunk_rows(client, chunk: list, prompt: str, detail: str = None) -> list:
+    """배치 하나를 분석해 결과 행 튜플 목록을 반환합니다.
+    
+    여러 장 요청이 실패하거나 응답에서 빠진 이미지는 1장씩 다시 요청하고,
+    그래도 실패하면 에러 행으로 남깁니다. (예외를 밖으로 내보내지 않음)
+    """
+    rows = []
+    
+    try:
+        analyses = call_with_retry(analyze_image_chunk, client, chunk, prompt, detail)
+    except Exception as e:
+        if len(chunk) == 1:
+            print(f"  ❌ 분석 실패 ({Path(chunk[0]).name}): {str(e)}")
+            return [exception_row(chunk[0], e)]
+        # 여러 장 요청이 실패하면 1장씩 다시 요청
+        print(f"  ⚠️ 배치 실패, 1장씩 재시도: {str(e)}")
+        analyses = [None] * len(chunk)
+    
+    # 각 이미지별 결과 저장 (응답에서 빠진 이미지는 1장씩 다시 요청)
+    for img_path, analysis_data in zip(chunk, analyses):
+        img_name = Path(img_path).name
+        if analysis_data is None and len(chunk) > 1:
+            try:
+                analysis_data = call_with_retry(analyze_image_chunk, client, [img_path], prompt, detail)[0]
+            except Exception as e:
+                print(f"  ❌ 재시도 실패 ({img_name}): {str(e)}")
+                rows.append(exception_row(img_path, e))
+                continue
+        
+        if analysis_data is None:
+            # 누락된 경우
+            rows.append((img_name, "Error", "", "Batch Error", "Missing in response"))
+        else:
+            # 기존 flatten 함수 재사용
+            try:
+                rows.extend(flatten_to_vertical(analysis_data, img_name))
+            except Exception as e:
+                print(f"  ❌ 결과 변환 실패 ({img_name}): {str(e)}")
+                rows.append(exception_row(img_path, e))
+    
+    return rows
+
+
+def batch_request_line(key: str, img_path: str, prompt: str, detail: str = None) -> dict:
+    """Batch API 입력 JSONL의 한 줄 (이미지 1장 = 요청 1개, 원격 이미지는 URI 참조)"""
+    if is_remote_image(img_path):
+        image_part = {"file_data": {"file_uri": str(img_path), "mime_type": remote_image_mime(str(img_path))}}
+    else:
+        img_data = encode_image(img_path)
+        image_part = {"inline_data": {
+            "mime_type": _sniff_mime(img_data[:12]),
+            "data": base64.b64encode(img_data).decode("ascii")
+        }}
+    
+    generation_config = {
+        "response_mime_type": "application/json",
+        "response_json_schema": _ANALYSIS_RESPONSE_SCHEMA
+    }
+    if detail:
+        generation_config["media_resolution"] = media_resolution_name(detail)
+    
+    return {
+        "key": key,
+        "request": {
+            "contents": [{
+                "parts": [{"text": prompt}, image_part]
+            }],
+            "generation_config": generation_config
+        }
+    }
+
+
+def batch_response_text(response: dict) -> str:
+    """Batch API 결과 한 줄의 response에서 응답 텍스트만 추출"""
+    parts = response["candidates"][0]["content"]["parts"]
+    return "".join(part.get("text", "") for part in parts)
+
+
+def analyze_with_batch_api(client, image_paths: list, prompt: str, detail: str = None) -> tuple:
+    """Gemini Batch API로 이미지 전체를 작업 하나로 제출하고 완료될 때까지 기다립니다.
+    
+    실시간 요청보다 느리지만(최대 24시간) 비용이 낮고 분당 요청 한도에 걸리지 않습니다.
+    
+    Returns:
+        tuple: (결과 행 튜플 목록, 결과를 받지 못해 다시 요청해야 하는 이미지 경로 목록)
+    """
+    keys = {f"img-{idx}": img_path for idx, img_path in enumerate(image_paths)}
+    rows_by_key = {}
+    
+    # 1. 요청 JSONL 작성 후 업로드 (이미지를 못 읽으면 바로 에러 행)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        request_file = Path(tmp_dir) / "batch_requests.jsonl"
+        
+        def prepare(item):
+            key, img_path = item
+            try:
+                return key, json.dumps(batch_request_line(key, img_path, prompt, detail), ensure_ascii=False), None
+            except Exception as e:
+                return key, None, e
+        
+        # 파일 읽기/축소/base64 인코딩은 이미지마다 독립적 → 스레드로 동시에 준비하고 쓰기는 원래 순서대로
+        with open(request_file, "w", encoding="utf-8") as f, \
+                ThreadPoolExecutor(max_workers=BATCH_PREPARE_WORKERS) as executor:
+            for key, line, error in executor.map(prepare, keys.items()):
+                if error is not None:
+                    print(f"  ❌ 이미지 준비 실패 ({Path(keys[key]).name}): {str(error)}")
+                    rows_by_key[key] = [exception_row(keys[key], error)]
+                    continue
+                f.write(line + "\n")
+        
+        uploaded = client.files.upload(
+            file=str(request_file),
+            config=types.UploadFileConfig(display_name=request_file.stem, mime_type="jsonl")
+        )
+    
+    job = client.batches.create(
+        model=GEMINI_MODEL,
+        src=uploaded.name,
+        config={"display_name": f"vlm_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}"}
+    )
+    print(f"🗂️ Batch 작업 제출: {job.name} ({len(keys) - len(rows_by_key)}장)")
+    
+    # 2. 완료될 때까지 상태 조회 (조회 간격은 지수적으로 늘림)
+    wait = BATCH_POLL_MIN_WAIT
+    while job.state.name not in BATCH_DONE_STATES:
+        print(f"  ⏳ Batch 상태: {job.state.name} ({wait}초 후 다시 확인)")
+        time.sleep(wait)
+        wait = min(wait * 2, BATCH_POLL_MAX_WAIT)
+        job = client.batches.get(name=job.name)
+    
+    if job.state.name != "JOB_STATE_SUCCEEDED":
+        print(f"  ⚠️ Batch 작업 실패 ({job.state.name}), 실시간 요청으로 전환")
+        return [], [img_path for key, img_path in keys.items() if key not in rows_by_key]
+    
+    # 3. 결과 파일의 각 줄을 기존 파싱/flatten 경로로 처리
+    result_lines = client.files.download(file=job.dest.file_name).decode("utf-8").splitlines()
+    for line in result_lines:
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        img_path = keys.get(item.get("key"))
+        if img_path is None or "response" not in item:
+            continue  # 에러 줄은 아래에서 실시간으로 다시 요청
+        
+        img_name = Path(img_path).name
+        try:
+            analysis_data = parse_chunk_response(batch_response_text(item["response"]), [img_path])[0]
+            if analysis_data is not None:
+                rows_by_key[item["key"]] = flatten_to_vertical(analysis_data, img_name)
+        except Exception as e:
+            print(f"  ⚠️ Batch 결과 처리 실패 ({img_name}): {str(e)}")
+    
+    retry_paths = [img_path for key, img_path in keys.items() if key not in rows_by_key]
+    rows = [row for key in keys if key in rows_by_key for row in rows_by_key[key]]
+    return rows, retry_paths
+
+
 def analyze_images_batch(
     image_paths: list,
     output_excel: str = None,
     references: dict = None,
-    batch_size: int = 1  # 1장씩 분석 (정확도 최우선)
+    batch_size: int = 4,  # API 한 번에 보내는 이미지 수 (결과가 안 맞는 배치는 1장씩 재요청)
+    concurrency: int = 10,  # 동시에 보내는 API 요청 수
+    use_batch_api: bool = False,  # True면 Gemini Batch API로 제출 (오프라인 대량 분석용)
+    detail: str = "low"  # 이미지 상세도 (의류 카테고리/속성 분류는 low로 충분, 토큰/지연 절감)
 ) -> pd.DataFrame:
-    """이미지를 개별 분석합니다. (정확도 최우선)"""
+    """이미지를 배치로 묶어 분석합니다.
+    
+    batch_size > 1이면 API 한 번에 여러 장을 보내고, 배치 요청이 실패하거나
+    응답 결과를 이미지와 맞출 수 없는 경우 해당 이미지만 1장씩 다시 요청합니다.
+    배치는 최대 concurrency개씩 동시에 요청하며, 결과 행 순서는 입력 순서를 유지합니다.
+    use_batch_api=True이고 이미지가 BATCH_API_MIN_IMAGES장 이상이면 Batch API 작업 하나로 제출하고,
+    결과를 받지 못한 이미지만 실시간으로 다시 요청합니다. (다시 요청한 이미지의 행은 뒤에 붙음)
+    """
     OUTPUT_DIR.mkdir(exist_ok=True)
     
     print("🔧 Gemini 클라이언트 초기화 중...")
-    client = setup_gemini()
+    client = get_client()
     
     # 배치 분석을 위한 프롬프트 수정 (여러 장을 처리하라고 지시)
     base_prompt = create_analysis_prompt(references)
@@ -491,6 +1114,7 @@ def analyze_images_batch(
     - Analyze EACH image sequentially.
     - Return a JSON Object with a key "results" containing a list of analysis for each image.
     - The order of the list must match the order of images provided.
+    - Set "file_name" to the exact name from the "--- next image: ... ---" label before each image.
     
     Example Output Structure:
     {
@@ -502,152 +1126,66 @@ def analyze_images_batch(
     """
     final_prompt = base_prompt + batch_instruction
 
-    all_rows = []
     total = len(image_paths)
+    total_start_time = time.time()
+    
+    # Batch API 작업으로 먼저 제출 (결과를 받지 못한 이미지만 아래 실시간 요청으로 처리)
+    batch_rows = []
+    realtime_paths = image_paths
+    if use_batch_api and total >= BATCH_API_MIN_IMAGES:
+        print(f"\n📊 총 {total}개 이미지, Batch API 작업으로 분석 시작...\n")
+        try:
+            batch_rows, realtime_paths = analyze_with_batch_api(client, image_paths, final_prompt, detail)
+        except Exception as e:
+            print(f"  ⚠️ Batch API 사용 실패, 실시간 요청으로 전환: {str(e)}")
+            batch_rows, realtime_paths = [], image_paths
     
     # 이미지 리스트를 배치 사이즈만큼 자르기 (chunking)
-    chunks = [image_paths[i:i + batch_size] for i in range(0, total, batch_size)]
+    chunks = [realtime_paths[i:i + batch_size] for i in range(0, len(realtime_paths), batch_size)]
     
-    print(f"\n📊 총 {total}개 이미지, {len(chunks)}개 배치로 분석 시작 (배치크기: {batch_size})...\n")
+    if chunks:
+        print(f"\n📊 총 {len(realtime_paths)}개 이미지, {len(chunks)}개 배치로 분석 시작 (배치크기: {batch_size}, 동시 요청: {concurrency})...\n")
     
-    total_start_time = time.time()
+    # 배치별 API 호출은 네트워크 대기가 대부분이므로 스레드로 동시에 요청 (결과는 배치 순서대로 합침)
+    chunk_rows = [None] * len(chunks)
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as executor:
+        futures = {
+            executor.submit(analyze_chunk_rows, client, chunk, final_prompt, detail): chunk_idx
+            for chunk_idx, chunk in enumerate(chunks)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            chunk_idx = futures[future]
+            chunk_rows[chunk_idx] = future.result()
+            print(f"📦 배치 [{done}/{len(chunks)}] 완료 ({len(chunks[chunk_idx])}장)")
     
-    for batch_idx, chunk in enumerate(chunks, 1):
-        print(f"📦 배치 [{batch_idx}/{len(chunks)}] 처리 중 ({len(chunk)}장)...")
-        
-        try:
-            # 1. 이번 배치의 이미지 데이터들 준비
-            contents = [final_prompt] # 프롬프트 먼저 넣고
-            batch_files = [] # 파일명 매핑용
-            
-            for img_path in chunk:
-                img_data = encode_image(img_path)
-                image_part = types.Part.from_bytes(data=img_data, mime_type="image/jpeg")
-                contents.append(image_part) # 이미지 계속 추가
-                batch_files.append(Path(img_path).name)
-
-            # 2. API 한 번 호출로 여러 이미지 동시 분석
-            response = client.models.generate_content(
-                model="gemini-3-pro-preview",
-                contents=contents,
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json" # JSON 강제 모드 (토큰 절약)
-                )
-            )
-            
-            # 3. 결과 파싱 및 매핑 (JSON 정제 - Extra data 에러 방지)
-            response_text = response.text.strip()
-            
-            # JSON 외 텍스트 제거 (```json ... ``` 형태 처리)
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0]
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0]
-            
-            # 첫 번째 유효한 JSON 객체만 추출 (raw_decode 사용)
-            response_text = response_text.strip()
-            try:
-                # raw_decode는 첫 번째 완전한 JSON만 파싱하고 나머지 무시
-                decoder = json.JSONDecoder()
-                result_json, _ = decoder.raw_decode(response_text)
-            except json.JSONDecodeError:
-                # { 로 시작하는 부분 찾기
-                start_idx = response_text.find('{')
-                if start_idx != -1:
-                    result_json, _ = decoder.raw_decode(response_text[start_idx:])
-                else:
-                    raise
-            
-            results_list = result_json.get("results", [])
-            
-            # 개수 불일치 안전장치: 결과가 이미지 수보다 적을 경우 대비
-            if isinstance(result_json, list): # 혹시 리스트로 바로 줄 경우
-                results_list = result_json
-            
-            # 4. 각 이미지별 결과 저장
-            for i, img_name in enumerate(batch_files):
-                if i < len(results_list):
-                    # 구조에 따라 분석 데이터 추출
-                    analysis_data = results_list[i].get("analysis", results_list[i])
-                    # 기존 flatten 함수 재사용
-                    rows = flatten_to_vertical(analysis_data, img_name)
-                    all_rows.extend(rows)
-                else:
-                    # 누락된 경우
-                    all_rows.append({"Image": img_name, "Cat": "Error", "Key": "Batch Error", "Value": "Missing in response"})
-
-            print(f"  ✓ 배치 완료")
-            
-        except Exception as e:
-            print(f"  ❌ 배치 실패: {str(e)}")
-            for img_path in chunk:
-                all_rows.append({
-                    "Image": Path(img_path).name,
-                    "Cat": "Error",
-                    "Subcat": "",
-                    "Key": "Exception",
-                    "Value": str(e)
-                })
+    all_rows = batch_rows + [row for rows in chunk_rows for row in rows]
     
     # 소요 시간 계산
     total_elapsed = time.time() - total_start_time
     
-    # DataFrame 생성
-    df = pd.DataFrame(all_rows, columns=["Image", "Cat", "Subcat", "Key", "Value"])
+    # 열 단위로 한 번 전치해 DataFrame/Parquet 생성에 같이 사용 (행 단위 추론 없음)
+    columns = result_columns(all_rows)
+    df = pd.DataFrame(columns)
     
-    # 성공/실패 카운트
-    success_count = len([r for r in all_rows if r.get("Cat") != "Error"])
-    fail_count = len([r for r in all_rows if r.get("Cat") == "Error"])
+    # 성공/실패 카운트 (Cat 열 리스트에서 C 레벨 count 한 번)
+    fail_count = columns["Cat"].count("Error")
+    success_count = len(all_rows) - fail_count
     
     if output_excel is None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_excel = OUTPUT_DIR / f"vlm_analysis_result_{timestamp}.xlsx"
     
-    with pd.ExcelWriter(output_excel, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='분석결과')
-        
-        worksheet = writer.sheets['분석결과']
-        
-        # 열 너비 설정
-        worksheet.column_dimensions['A'].width = 15  # Image
-        worksheet.column_dimensions['B'].width = 25  # Cat
-        worksheet.column_dimensions['C'].width = 20  # Subcat
-        worksheet.column_dimensions['D'].width = 25  # Key
-        worksheet.column_dimensions['E'].width = 40  # Value
-        
-        # 이미지 썸네일 삽입
-        print("\n🖼️ 엑셀에 이미지 썸네일 삽입 중...")
-        inserted_images = set()
-        
-        for row_idx, row in enumerate(df.itertuples(), start=2):
-            image_name = row.Image
-            
-            if image_name not in inserted_images:
-                image_path = IMAGES_DIR / image_name
-                
-                if image_path.exists():
-                    try:
-                        img = PILImage.open(image_path)
-                        img.thumbnail((80, 80))
-                        
-                        img_buffer = BytesIO()
-                        img.save(img_buffer, format='JPEG')
-                        img_buffer.seek(0)
-                        
-                        xl_img = XLImage(img_buffer)
-                        xl_img.width = 80
-                        xl_img.height = 80
-                        
-                        cell = f'A{row_idx}'
-                        worksheet.add_image(xl_img, cell)
-                        
-                        worksheet.row_dimensions[row_idx].height = 65
-                        
-                        inserted_images.add(image_name)
-                    except Exception as e:
-                        print(f"  ⚠️ 이미지 삽입 실패 ({image_name}): {e}")
-        
-        print(f"  ✓ {len(inserted_images)}개 이미지 썸네일 삽입 완료")
+    # 기계 처리용 Parquet (DataFrame을 거치지 않고 열 리스트에서 바로 변환)
+    try:
+        parquet_path = save_results_parquet(columns, output_excel)
+        if parquet_path:
+            print(f"💾 Parquet 저장: {parquet_path}")
+    except Exception as e:
+        print(f"  ⚠️ Parquet 저장 실패: {e}")
+    
+    # 썸네일용 파일명 → 실제 분석한 경로 (IMAGES_DIR 밖의 이미지도 썸네일 삽입)
+    path_by_name = {Path(p).name: p for p in image_paths if not is_remote_image(p)}
+    save_results_excel(df, output_excel, path_by_name)
     
     avg_time = total_elapsed / total if total > 0 else 0
     
@@ -662,14 +1200,175 @@ def analyze_images_batch(
     return df
 
 
-def analyze_single_image(image_path: str, references: dict = None) -> dict:
+def result_columns(rows: list) -> dict:
+    """결과 행 튜플 목록을 열 이름 → 값 리스트로 전치합니다. (RESULT_COLUMNS 순서)"""
+    columns = zip(*rows) if rows else [()] * len(RESULT_COLUMNS)
+    return {name: list(col) for name, col in zip(RESULT_COLUMNS, columns)}
+
+
+def save_results_parquet(columns: dict, output_excel) -> Path:
+    """결과 열 리스트(result_columns)를 엑셀 옆에 Parquet으로 저장합니다.
+    
+    대시보드의 정규화 사이드카(`<엑셀명>.v<버전>.parquet`)와 구분되도록 `<엑셀명>_rows.parquet`으로 저장합니다.
+    pyarrow가 없으면 아무것도 하지 않고 None을 반환합니다.
+    """
+    if pa is None:
+        return None
+    
+    output_excel = Path(output_excel)
+    parquet_path = output_excel.with_name(f"{output_excel.stem}_rows.parquet")
+    
+    table = pa.table({name: pa.array(col, type=pa.string()) for name, col in columns.items()})
+    pq.write_table(table, parquet_path, compression='zstd')
+    return parquet_path
+
+
+def make_thumbnail(image_path: Path) -> tuple:
+    """엑셀에 넣을 썸네일 JPEG 버퍼와 썸네일 크기 (가로, 세로 px)"""
+    with PILImage.open(image_path) as img:
+        # JPEG은 디코딩 단계에서 1/2~1/8 해상도로 바로 읽음 (원본 크기 전체 디코딩 생략)
+        if img.format == 'JPEG':
+            img.draft('RGB', (THUMBNAIL_SIZE * 2, THUMBNAIL_SIZE * 2))
+        img.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), PILImage.LANCZOS)
+        
+        img_buffer = BytesIO()
+        img.save(img_buffer, format='JPEG')
+    img_buffer.seek(0)
+    return img_buffer, img.size
+
+
+def save_results_excel(df: pd.DataFrame, output_excel, path_by_name: dict = None) -> None:
+    """분석 결과를 이미지 썸네일과 함께 엑셀로 저장합니다.
+    
+    xlsxwriter가 설치되어 있으면 constant_memory 모드(행을 쓰는 즉시 디스크로 내보냄)로,
+    없으면 openpyxl로 저장합니다.
+    path_by_name에 없는 이미지는 IMAGES_DIR에서 찾습니다.
+    """
+    print("\n🖼️ 엑셀에 이미지 썸네일 삽입 중...")
+    thumbnails = prepare_thumbnails(df, path_by_name)
+    if xlsxwriter is not None:
+        _save_results_xlsxwriter(df, output_excel, thumbnails)
+    else:
+        _save_results_openpyxl(df, output_excel, thumbnails)
+    print(f"  ✓ {len(thumbnails)}개 이미지 썸네일 삽입 완료")
+
+
+def prepare_thumbnails(df: pd.DataFrame, path_by_name: dict = None) -> dict:
+    """이미지별 첫 행 위치(0부터, 헤더 제외) → (썸네일 버퍼, 크기)
+    
+    결과 행 전체가 아니라 고유 이미지마다 한 번만, 엑셀을 쓰기 전에 미리 썸네일을 만듭니다.
+    """
+    first_rows = df['Image'].reset_index(drop=True).drop_duplicates()
+    path_by_name = path_by_name or {}
+    thumbnails = {}
+    
+    # 고유 이미지마다 경로를 한 번만 만들고 파일 확인도 한 번만
+    targets = []
+    for row_pos, image_name in first_rows.items():
+        image_path = path_by_name.get(image_name) or IMAGES_DIR / image_name
+        if os.path.isfile(image_path):
+            targets.append((row_pos, image_name, image_path))
+    
+    # 디코딩/축소/인코딩은 Pillow가 GIL을 놓고 처리하므로 스레드로 동시에 생성
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as executor:
+        futures = [
+            (row_pos, image_name, executor.submit(make_thumbnail, image_path))
+            for row_pos, image_name, image_path in targets
+        ]
+        for row_pos, image_name, future in futures:
+            try:
+                thumbnails[row_pos] = future.result()
+            except Exception as e:
+                print(f"  ⚠️ 이미지 삽입 실패 ({image_name}): {e}")
+    
+    return thumbnails
+
+
+def _save_results_xlsxwriter(df: pd.DataFrame, output_excel, thumbnails: dict) -> None:
+    """xlsxwriter constant_memory 모드로 저장 (행 높이/썸네일은 그 행을 쓰기 전에 지정)"""
+    workbook = xlsxwriter.Workbook(str(output_excel), {
+        'constant_memory': True,
+        'strings_to_formulas': False,  # '='로 시작하는 값도 문자열 그대로
+        'strings_to_urls': False,
+    })
+    
+    try:
+        worksheet = workbook.add_worksheet('분석결과')
+        
+        # 열 너비 설정
+        for col, width in EXCEL_COLUMN_WIDTHS.items():
+            worksheet.set_column(f'{col}:{col}', width)
+        
+        # 헤더 (pandas to_excel 헤더와 같은 서식)
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        worksheet.write_row(0, 0, list(df.columns), header_format)
+        
+        for row_pos, row in enumerate(df.itertuples(index=False, name=None)):
+            row_idx = row_pos + 1
+            
+            thumbnail = thumbnails.get(row_pos)
+            if thumbnail is not None:
+                img_buffer, (width, height) = thumbnail
+                worksheet.set_row(row_idx, THUMBNAIL_ROW_HEIGHT)
+                worksheet.insert_image(row_idx, 0, row[0], {
+                    'image_data': img_buffer,
+                    'x_scale': THUMBNAIL_SIZE / width,
+                    'y_scale': THUMBNAIL_SIZE / height
+                })
+            
+            worksheet.write_row(row_idx, 0, row)
+    finally:
+        workbook.close()
+
+
+def _save_results_openpyxl(df: pd.DataFrame, output_excel, thumbnails: dict) -> None:
+    """openpyxl write_only 모드로 저장 (xlsxwriter가 없을 때, 셀 객체를 시트 전체만큼 만들지 않음)
+    
+    write_only 시트는 행을 append하는 순서대로만 쓸 수 있으므로
+    열 너비는 첫 행 전에, 행 높이/썸네일은 그 행을 append하기 전에 지정합니다.
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet('분석결과')
+    
+    # 열 너비 설정
+    for col, width in EXCEL_COLUMN_WIDTHS.items():
+        worksheet.column_dimensions[col].width = width
+    
+    # 헤더 (pandas to_excel 헤더와 같은 서식)
+    header = []
+    for name in df.columns:
+        cell = WriteOnlyCell(worksheet, value=name)
+        cell.font = Font(bold=True)
+        cell.border = Border(*(Side(style='thin'),) * 4)
+        cell.alignment = Alignment(horizontal='center', vertical='top')
+        header.append(cell)
+    worksheet.append(header)
+    
+    for row_pos, row in enumerate(df.itertuples(index=False, name=None)):
+        row_idx = row_pos + 2
+        
+        thumbnail = thumbnails.get(row_pos)
+        if thumbnail is not None:
+            xl_img = XLImage(thumbnail[0])
+            xl_img.width = THUMBNAIL_SIZE
+            xl_img.height = THUMBNAIL_SIZE
+            worksheet.add_image(xl_img, f'A{row_idx}')
+            
+            worksheet.row_dimensions[row_idx].height = THUMBNAIL_ROW_HEIGHT
+        
+        worksheet.append(row)
+    
+    workbook.save(output_excel)
+
+
+def analyze_single_image(image_path: str, references: dict = None, detail: str = "high") -> dict:
     """단일 이미지를 분석합니다. (테스트용)"""
-    client = setup_gemini()
+    client = get_client()
     
     prompt = create_analysis_prompt(references)
     
     print(f"🔍 이미지 분석 중: {image_path}")
-    result = analyze_image(client, image_path, prompt)
+    result = analyze_image(client, image_path, prompt, detail)
     
     if result["success"]:
         parsed = parse_gemini_response(result["result"])
@@ -681,9 +1380,9 @@ def analyze_single_image(image_path: str, references: dict = None) -> dict:
         print("-" * 100)
         print(f"{'Cat':<25} {'Subcat':<20} {'Key':<25} {'Value':<25}")
         print("-" * 100)
-        for row in rows:
-            val = row['Value'][:25] if len(row['Value']) > 25 else row['Value']
-            print(f"{row['Cat']:<25} {row['Subcat']:<20} {row['Key']:<25} {val:<25}")
+        for _, cat, subcat, key, value in rows:
+            val = value[:25] if len(value) > 25 else value
+            print(f"{cat:<25} {subcat:<20} {key:<25} {val:<25}")
         
         return parsed
     else:
@@ -710,10 +1409,9 @@ def main():
     print("🖼️  Gemini VLM 이미지 분석 (카테고리별 속성)")
     print("="*60)
     
-    # 기준정보 파싱 및 저장
+    # 기준정보 파싱 및 저장 (JSON 캐시가 최신이면 파싱 생략)
     print("\n[1] 기준정보 파싱 중...")
     references = load_all_references()
-    save_references_to_json(references)
     
     # 기준정보 요약 출력
     print("\n📋 마케팅 기준정보:")